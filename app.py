@@ -3,9 +3,20 @@ from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 import sqlite3
 import os
+import base64
 import webbrowser
 from datetime import datetime, timedelta
-from billing import generate_pdf_bill
+from billing import render_pdf_bill, render_bill_csv, render_bill_json
+from archive import init_archive, store_bill, export_bill
+from assets import init_assets, load_thumbnails
+from day_close import init_day_close, close_day, format_z_report
+from retention import open_history, archive_path_for, ensure_line_price
+from replica import (REFRESH_MS, replica_path_for, log_report, flush_reports, refresh_in_background,
+                     stale_against_archive)
+from kot import make_ticket, publish_ticket
+from orders import fetch_order, load_order_items, save_order, sales_summary
+from rules import Cart, init_rules, load_price_book
+from search import PAGE_SIZE, init_search, search_orders, sync_search_index
 
 # =========================
 # GLOBALS
@@ -15,18 +26,28 @@ IMAGE_FOLDER = os.path.join(BASE_DIR, "images")
 
 # runtime state
 menu_data = []            # [(id, name, price, image_path, tax_percent), ...]
+menu_by_id = {}           # id -> menu_data row
 item_entries = {}         # item_id -> qty Entry
-image_refs = []           # to keep PhotoImage alive
+menu_thumbs = {}          # item_id -> 50px PNG bytes from menu_images
+image_refs = {}           # item_id -> PhotoImage (kept alive, built once)
+price_book = None         # compiled pricing rules for the loaded menu
+live_cart = None          # rules.Cart kept in step with the qty boxes
+logo_refs = {}            # size -> PhotoImage of kiruba.png (decoded once)
+preview_win = None        # the open bill preview (one at a time)
 
 # Tk variables (created in main_app)
 order_mode = None
 payment_method = None
 subtotal_var = None
 total_var = None
+promo_var = None
 discount_entry = None
+coupon_entry = None
 tax_entry = None
 
 root = None
+current_role = None
+table_var = None          # table picked on the billing form for the order being billed
 
 
 # =========================
@@ -78,10 +99,13 @@ def init_db():
             order_id INTEGER,
             item_id INTEGER,
             quantity INTEGER,
+            price REAL,
             FOREIGN KEY(order_id) REFERENCES orders(id),
             FOREIGN KEY(item_id) REFERENCES menu_items(id)
         )
     """)
+    # DBs from before line prices were stored
+    ensure_line_price(conn)
 
     c.execute("""
         CREATE TABLE IF NOT EXISTS payments (
@@ -105,6 +129,20 @@ def init_db():
         )
     """)
 
+    # Bill archive index (invoice -> segment offset)
+    init_archive(conn)
+
+    # Pre-built menu thumbnails (filled by db_setup)
+    init_assets(conn)
+
+    # End-of-day close records (Z-reports)
+    init_day_close(conn)
+    init_rules(conn)
+
+    # Order search: secondary indexes + FTS, catch up on unindexed orders
+    init_search(conn)
+    sync_search_index(conn)
+
     # Seed default admin if not present
     c.execute("SELECT COUNT(*) FROM users")
     if (c.fetchone() or [0])[0] == 0:
@@ -119,38 +157,66 @@ def init_db():
 
 def load_menu():
     """Load menu into memory."""
-    global menu_data
+    global menu_data, menu_by_id, menu_thumbs, price_book, live_cart
     conn = sqlite3.connect("restaurant.db")
     c = conn.cursor()
     c.execute("SELECT id, name, price, image_path, tax_percent FROM menu_items")
     menu_data = c.fetchall() or []
+    menu_by_id = {row[0]: row for row in menu_data}
+    menu_thumbs = load_thumbnails(conn, 50)
+    price_book = load_price_book(conn, menu_by_id)
+    live_cart = Cart(price_book)
     conn.close()
+    image_refs.clear()
 
 
 # =========================
 # CALCULATIONS
 # =========================
-def calculate_total():
-    """Compute subtotal, per-item tax, apply discount, update UI."""
-    subtotal = 0.0
-    total_tax = 0.0
-
+def read_cart():
+    """Return [(item_id, qty), ...] from the qty boxes, or None on bad input."""
+    cart = []
     for item_id, entry in item_entries.items():
         val = entry.get()
         try:
             qty = int(val) if val else 0
         except ValueError:
             messagebox.showerror("Input Error", f"Invalid quantity '{val}'")
-            return
-
+            return None
         if qty > 0:
-            item = next((i for i in menu_data if i[0] == item_id), None)
-            if item:
-                price = float(item[2])
-                tax_percent = float(item[4] or 0)
-                line_total = qty * price
-                subtotal += line_total
-                total_tax += (line_total * tax_percent / 100.0)
+            cart.append((item_id, qty))
+    return cart
+
+
+def show_totals(totals):
+    subtotal_var.set(f"{totals['subtotal']:.2f}")
+    tax_entry.delete(0, tk.END)
+    tax_entry.insert(0, f"{totals['tax']:.2f}")
+    total_var.set(f"{totals['final_total']:.2f}")
+    promo_var.set("\n".join(f"{name}: -₹{off:.2f}" for name, off in totals.get('promotions', ())))
+
+
+def on_qty_change(item_id):
+    """Re-price just the edited line as the cashier types."""
+    val = item_entries[item_id].get()
+    if val and not val.isdigit():
+        return
+    try:
+        discount = float(discount_entry.get() or 0)
+    except ValueError:
+        discount = 0.0
+    live_cart.retime()
+    live_cart.set_qty(item_id, int(val or 0))
+    totals = live_cart.totals(discount)
+    totals['promotions'] = live_cart.promotions()
+    show_totals(totals)
+
+
+def calculate_total():
+    """Compute subtotal, tax slabs and promotions, apply discount, update UI."""
+    cart = read_cart()
+    if cart is None:
+        return
 
     try:
         discount = float(discount_entry.get() or 0)
@@ -158,70 +224,68 @@ def calculate_total():
         messagebox.showerror("Input Error", "Enter a valid discount")
         return
 
-    total = subtotal - discount + total_tax
-    subtotal_var.set(f"{subtotal:.2f}")
-    tax_entry.delete(0, tk.END)
-    tax_entry.insert(0, f"{total_tax:.2f}")
-    total_var.set(f"{total:.2f}")
+    live_cart.retime()
+    live_cart.update(cart)
+    live_cart.set_coupon(coupon_entry.get())
+    totals = live_cart.totals(discount)
+    totals['promotions'] = live_cart.promotions()
+    show_totals(totals)
+    return totals
 
 
 # =========================
 # EXPORT HELPERS
 # =========================
 def export_bill_csv(order_id, items, totals):
-    """Export bill items + totals to CSV. Returns filename."""
-    fname = f"bill_order_{order_id}.csv"
-    import csv
-    with open(fname, 'w', newline='', encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(['Item', 'Quantity', 'Price', 'Total'])
-        for itm in items:
-            writer.writerow([itm['name'], itm['quantity'], itm['price'], itm['quantity'] * itm['price']])
-        writer.writerow([])
-        writer.writerow(['Subtotal', totals['subtotal']])
-        writer.writerow(['Discount', totals['discount']])
-        writer.writerow(['Tax', totals['tax']])
-        writer.writerow(['Final Total', totals['final_total']])
-    return fname
-
-
-def export_bill_json(order_id, items, totals):
-    """Export bill as JSON. Returns filename."""
-    fname = f"bill_order_{order_id}.json"
-    import json
-    data = {
-        'order_id': order_id,
-        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'items': items,
-        'totals': totals,
-    }
-    with open(fname, 'w', encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    return fname
+    """Archive the bill as CSV and copy it to the exports folder. Returns filename."""
+    store_bill(order_id, "csv", render_bill_csv(items, totals), skip_existing=True)
+    return export_bill(order_id, "csv")
+
+
+def export_bill_json(order_id, items, totals, when=None):
+    """Archive the bill as JSON and copy it to the exports folder. Returns filename.
+
+    when is the order's stored timestamp; a fresh bill is dated now.
+    """
+    date = when or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    store_bill(order_id, "json", render_bill_json(order_id, items, totals, date), skip_existing=True)
+    return export_bill(order_id, "json")
 
 
 # =========================
 # BILL PREVIEW
 # =========================
-def display_bill_preview(invoice_number, items, totals, pdf_path):
-    win = tk.Toplevel(root)
+def logo_photo(size):
+    """kiruba.png as a PhotoImage, decoded once per size (None if missing)."""
+    if size not in logo_refs:
+        try:
+            with Image.open("kiruba.png") as img:
+                logo_refs[size] = ImageTk.PhotoImage(img.resize((size, size), Image.LANCZOS))
+        except Exception:
+            logo_refs[size] = None
+    return logo_refs[size]
+
+
+def display_bill_preview(invoice_number, items, totals, when=None):
+    global preview_win
+    # replace the previous preview instead of stacking a window per order
+    if preview_win is not None and preview_win.winfo_exists():
+        preview_win.destroy()
+    win = preview_win = tk.Toplevel(root)
     win.title(f"Bill Preview — Order {invoice_number}")
     win.geometry("520x640")
 
     # ====== Logo ======
-    try:
-        logo_image = Image.open("kiruba.png")
-        logo_image = logo_image.resize((100, 100), Image.LANCZOS)
-        logo_photo = ImageTk.PhotoImage(logo_image)
-
-        logo_label = tk.Label(win, image=logo_photo, bg="white")
-        logo_label.image = logo_photo
-        logo_label.pack(pady=5)
-    except Exception as e:
+    logo = logo_photo(100)
+    if logo is not None:
+        tk.Label(win, image=logo, bg="white").pack(pady=5)
+    else:
         tk.Label(win, text="KIRUBA RESTAURANT", font=("Arial", 16, "bold"), bg="white").pack(pady=5)
 
     tk.Label(win, text=f"Invoice #: {invoice_number}", font=("Arial", 14, "bold")).pack(pady=5)
-    tk.Label(win, text=f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}").pack()
+    # reprints carry the order's own timestamp
+    when = when or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    tk.Label(win, text=f"Date: {when[:16]}").pack()
 
     text = tk.Text(win, width=64, height=22, font=("Courier New", 10))
     text.pack(pady=10)
@@ -231,6 +295,8 @@ def display_bill_preview(invoice_number, items, totals, pdf_path):
     text.insert(tk.END, f"{'-'*40}\n")
     text.insert(tk.END, f"Subtotal:   ₹{totals['subtotal']:.2f}\n")
     text.insert(tk.END, f"Discount:   ₹{totals['discount']:.2f}\n")
+    for name, off in totals.get('promotions', ()):
+        text.insert(tk.END, f"  {name:<26} -₹{off:.2f}\n")
     text.insert(tk.END, f"Tax:        ₹{totals['tax']:.2f}\n")
     text.insert(tk.END, f"Final Total:₹{totals['final_total']:.2f}\n")
     text.insert(tk.END, f"{'-'*40}\n")
@@ -239,19 +305,24 @@ def display_bill_preview(invoice_number, items, totals, pdf_path):
     text.config(state="disabled")
 
     def show_pdf_path():
-        messagebox.showinfo("PDF Saved", f"Saved at:\n{os.path.abspath(pdf_path)}")
+        pdf_path = export_bill(invoice_number, "pdf")
+        if pdf_path:
+            messagebox.showinfo("PDF Saved", f"Saved at:\n{os.path.abspath(pdf_path)}")
+        else:
+            messagebox.showerror("Error", "PDF not found in archive.")
 
     def export_csv_btn():
         p = export_bill_csv(invoice_number, items, totals)
         messagebox.showinfo("CSV", f"Saved: {p}")
 
     def export_json_btn():
-        p = export_bill_json(invoice_number, items, totals)
+        p = export_bill_json(invoice_number, items, totals, when)
         messagebox.showinfo("JSON", f"Saved: {p}")
 
     def share_whatsapp():
-        abs_path = os.path.abspath(pdf_path)
-        if os.path.exists(abs_path):
+        pdf_path = export_bill(invoice_number, "pdf")
+        if pdf_path:
+            abs_path = os.path.abspath(pdf_path)
             webbrowser.open("https://web.whatsapp.com")
             messagebox.showinfo("WhatsApp", f"Attach this file manually:\n{abs_path}")
         else:
@@ -269,67 +340,61 @@ def display_bill_preview(invoice_number, items, totals, pdf_path):
 # ORDER SUBMISSION
 # =========================
 def submit_order():
-    calculate_total()
-    final = float(total_var.get())
-    if final <= 0:
+    totals = calculate_total()
+    if totals is None:
+        return
+    if totals['final_total'] <= 0:
         messagebox.showwarning("Empty Order", "Add items before submitting.")
         return
 
+    cart = read_cart()
     conn = sqlite3.connect("restaurant.db")
-    c = conn.cursor()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    subtotal = float(subtotal_var.get())
-    discount = float(discount_entry.get() or 0)
-    tax = float(tax_entry.get() or 0)
-
-    # Insert order
-    c.execute("""
-        INSERT INTO orders (timestamp, mode, total, discount, tax, final_total)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (timestamp, order_mode.get(), subtotal, discount, tax, final))
-    order_id = c.lastrowid
-
-    # Invoice number
-    year = datetime.now().year
-    invoice_number = f"ORD-{year}-{order_id:04d}"
-
     try:
-        c.execute("UPDATE orders SET invoice_number = ? WHERE id = ?", (invoice_number, order_id))
-    except sqlite3.OperationalError:
-        pass
-
-    # Items
-    ordered_items = []
-    for item_id, entry in item_entries.items():
-        try:
-            qty = int(entry.get() or 0)
-        except ValueError:
-            qty = 0
-        if qty > 0:
-            c.execute("INSERT INTO order_items (order_id, item_id, quantity) VALUES (?, ?, ?)",
-                      (order_id, item_id, qty))
-            item = next((i for i in menu_data if i[0] == item_id), None)
-            if item:
-                ordered_items.append({'name': item[1], 'price': float(item[2]), 'quantity': qty})
-
-    # Payment
-    c.execute("INSERT INTO payments (order_id, payment_method, amount_paid) VALUES (?, ?, ?)",
-              (order_id, payment_method.get(), final))
+        order_id, invoice_number, ordered_items = save_order(
+            conn, order_mode.get(), payment_method.get(), cart, totals, menu_by_id)
+    finally:
+        conn.close()
 
-    conn.commit()
-    conn.close()
+    # Push the ticket to the kitchen (background thread, never blocks billing)
+    # with the table picked on the form; the pick is used once
+    table = int(table_var.get()) if order_mode.get() == "Dine-In" and table_var.get() else None
+    table_var.set("")
+    publish_ticket(make_ticket(order_id, invoice_number, order_mode.get(), table,
+                               [(item_id, menu_by_id[item_id][1], qty) for item_id, qty in cart if item_id in menu_by_id]))
 
-    # Generate PDF & preview
-    pdf_path = f"bill_{invoice_number}.pdf"
-    totals = {'subtotal': subtotal, 'discount': discount, 'tax': tax, 'final_total': final}
-    generate_pdf_bill(invoice_number, ordered_items, totals, pdf_path)
-    messagebox.showinfo("Success", f"Bill saved as {pdf_path}")
-    display_bill_preview(invoice_number, ordered_items, totals, pdf_path)
+    # Generate PDF into the bill archive & preview
+    segment, _ = store_bill(invoice_number, "pdf", render_pdf_bill(invoice_number, ordered_items, totals))
+    messagebox.showinfo("Success", f"Bill {invoice_number} archived in {segment}")
+    display_bill_preview(invoice_number, ordered_items, totals)
 
 
 # =========================
 # SALES DASHBOARD
 # =========================
+def report_connection():
+    """Read connection for reports: the replica when it exists, else the live DB.
+
+    Returns (conn, as_of) where as_of says how fresh the data is.
+    """
+    replica = replica_path_for("restaurant.db")
+    if os.path.exists(replica):
+        as_of = datetime.fromtimestamp(os.path.getmtime(replica)).strftime("%H:%M:%S")
+        conn = open_history(replica, archive_path=archive_path_for("restaurant.db"), read_only=True)
+        if not stale_against_archive(conn):
+            return conn, as_of
+        # retention moved orders since the last snapshot: they would count
+        # twice, so read live and have the replica re-snapshotted now
+        conn.close()
+        refresh_in_background("restaurant.db")
+    return open_history("restaurant.db"), "live"
+
+
+def schedule_replica_refresh():
+    """Refresh the reporting replica and flush report logs every REFRESH_MS."""
+    refresh_in_background("restaurant.db")
+    root.after(REFRESH_MS, schedule_replica_refresh)
+
+
 def open_sales_dashboard():
     win = tk.Toplevel(root)
     win.title("📊 Sales Report Dashboard")
@@ -350,41 +415,16 @@ def open_sales_dashboard():
         else:
             return
 
-        conn = sqlite3.connect("restaurant.db")
-        c = conn.cursor()
-
-        c.execute("""
-            SELECT COUNT(*), SUM(final_total), SUM(tax)
-            FROM orders
-            WHERE timestamp >= ?
-        """, (start.strftime("%Y-%m-%d %H:%M:%S"),))
-        row = c.fetchone() or (0, 0.0, 0.0)
-        num_orders = row[0] or 0
-        total_sales = row[1] or 0.0
-        total_tax = row[2] or 0.0
-
-        c.execute("""
-            SELECT mi.name, SUM(oi.quantity) as total_qty
-            FROM order_items oi
-            JOIN orders o ON o.id = oi.order_id
-            JOIN menu_items mi ON mi.id = oi.item_id
-            WHERE o.timestamp >= ?
-            GROUP BY oi.item_id
-            ORDER BY total_qty DESC
-            LIMIT 5
-        """, (start.strftime("%Y-%m-%d %H:%M:%S"),))
-        top_items = c.fetchall() or []
-
-        # (Optional) log to reports table
-        c.execute("""
-            INSERT INTO reports (generated_on, period, total_orders, total_sales, total_tax)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            mode, num_orders, total_sales, total_tax
-        ))
-        conn.commit()
+        conn, as_of = report_connection()
+        summary = sales_summary(conn, start)
         conn.close()
+        num_orders = summary['orders']
+        total_sales = summary['sales']
+        total_tax = summary['tax']
+        top_items = summary['top_items']
+
+        # (Optional) log to reports table -- buffered, written on the next refresh
+        log_report(mode, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), num_orders, total_sales, total_tax)
 
         sales_data = {
             'mode': mode,
@@ -399,6 +439,7 @@ def open_sales_dashboard():
         result_text.delete(1.0, tk.END)
         result_text.insert(tk.END, f"🕒 Period: {mode.capitalize()}\n")
         result_text.insert(tk.END, f"📅 From: {sales_data['start']}\n")
+        result_text.insert(tk.END, f"🔄 Data as of: {as_of}\n")
         result_text.insert(tk.END, f"🧾 Orders: {num_orders}\n")
         result_text.insert(tk.END, f"💰 Total Sales: ₹{total_sales:.2f}\n")
         result_text.insert(tk.END, f"🧮 Total Tax: ₹{total_tax:.2f}\n\n")
@@ -441,10 +482,280 @@ def open_sales_dashboard():
 
     tk.Button(win, text="⬇ Export to CSV", command=export_to_csv, bg="#99ccff").pack(pady=10)
 
+    def on_close():
+        flush_reports("restaurant.db")
+        win.destroy()
+
+    win.protocol("WM_DELETE_WINDOW", on_close)
+
+
+# =========================
+# ORDER SEARCH (admin)
+# =========================
+def open_order_search():
+    win = tk.Toplevel(root)
+    win.title("🔎 Order Search")
+    win.geometry("820x560")
+
+    filters = tk.Frame(win)
+    filters.pack(fill="x", padx=10, pady=10)
+
+    fields = {}
+    for col, (key, label) in enumerate([("text", "Text"), ("invoice", "Invoice #"), ("item", "Item"),
+                                        ("min_amount", "Min ₹"), ("max_amount", "Max ₹"),
+                                        ("date_from", "From (YYYY-MM-DD)"), ("date_to", "To")]):
+        tk.Label(filters, text=label).grid(row=(col // 4) * 2, column=col % 4, sticky="w", padx=4)
+        entry = tk.Entry(filters, width=18)
+        entry.grid(row=(col // 4) * 2 + 1, column=col % 4, padx=4, pady=(0, 6))
+        fields[key] = entry
+
+    mode_var = tk.StringVar(value="")
+    method_var = tk.StringVar(value="")
+    tk.Label(filters, text="Mode").grid(row=2, column=3, sticky="w", padx=4)
+    ttk.Combobox(filters, textvariable=mode_var, values=["", "Dine-In", "Takeaway"],
+                 state="readonly", width=15).grid(row=3, column=3, padx=4)
+    tk.Label(filters, text="Payment").grid(row=0, column=4, sticky="w", padx=4)
+    ttk.Combobox(filters, textvariable=method_var, values=["", "Cash", "Card", "UPI"],
+                 state="readonly", width=15).grid(row=1, column=4, padx=4)
+
+    cols = ("invoice", "date", "mode", "payment", "total")
+    tree = ttk.Treeview(win, columns=cols, show="headings", height=PAGE_SIZE // 2)
+    for col, width in zip(cols, (140, 160, 100, 100, 100)):
+        tree.heading(col, text=col.capitalize())
+        tree.column(col, width=width, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10)
+
+    status_var = tk.StringVar(value="")
+    # cursors[i] is the keyset that starts page i
+    cursors = [None]
+    last_row = {}
+
+    def current_filters():
+        params = {k: e.get().strip() or None for k, e in fields.items()}
+        for k in ("min_amount", "max_amount"):
+            if params[k] is not None:
+                params[k] = float(params[k])
+        params["mode"] = mode_var.get() or None
+        params["payment_method"] = method_var.get() or None
+        return params
+
+    def load_page():
+        try:
+            params = current_filters()
+        except ValueError:
+            messagebox.showerror("Input Error", "Enter a valid amount", parent=win)
+            return
+        conn = open_history("restaurant.db")
+        rows = search_orders(conn, after=cursors[-1], **params)
+        conn.close()
+
+        tree.delete(*tree.get_children())
+        for order_id, invoice, ts, mode, final_total, method in rows:
+            tree.insert("", tk.END, iid=str(order_id),
+                        values=(invoice or order_id, ts, mode, method or "", f"{float(final_total or 0):.2f}"))
+        last_row["key"] = (rows[-1][2], rows[-1][0]) if len(rows) == PAGE_SIZE else None
+        status_var.set(f"Page {len(cursors)}  ·  {len(rows)} order(s)")
+
+    def do_search():
+        del cursors[1:]
+        load_page()
+
+    def next_page():
+        if last_row.get("key"):
+            cursors.append(last_row["key"])
+            load_page()
+
+    def prev_page():
+        if len(cursors) > 1:
+            cursors.pop()
+            load_page()
+
+    def open_selected(event=None):
+        sel = tree.selection()
+        if sel:
+            reprint_order(int(sel[0]))
+
+    tree.bind("<Double-1>", open_selected)
+
+    nav = tk.Frame(win)
+    nav.pack(fill="x", padx=10, pady=10)
+    tk.Button(nav, text="Search", command=do_search, bg="#cce6ff").pack(side="left")
+    tk.Button(nav, text="◀ Prev", command=prev_page).pack(side="left", padx=5)
+    tk.Button(nav, text="Next ▶", command=next_page).pack(side="left")
+    tk.Label(nav, textvariable=status_var).pack(side="left", padx=10)
+    tk.Button(nav, text="Open Bill", command=open_selected).pack(side="right")
+
+    do_search()
+
+
+# =========================
+# ORDER HISTORY
+# =========================
+def reprint_order(order_id):
+    """Reopen the bill preview for a stored order."""
+    conn = open_history("restaurant.db")
+    order = fetch_order(conn, order_id)
+    items = load_order_items(conn, order_id)
+    conn.close()
+    if order:
+        display_bill_preview(order['invoice_number'], items, order['totals'], order['timestamp'])
+
+
+def open_order_history():
+    """Newest-first order list; pages load as you scroll, lines load when a row is expanded."""
+    win = tk.Toplevel(root)
+    win.title("📜 Order History")
+    win.geometry("860x560")
+
+    top = tk.Frame(win)
+    top.pack(fill="x", padx=10, pady=10)
+    tk.Label(top, text="Up to date (YYYY-MM-DD):").pack(side="left")
+    date_entry = tk.Entry(top, width=14)
+    date_entry.pack(side="left", padx=5)
+
+    body = tk.Frame(win)
+    body.pack(fill="both", expand=True, padx=10)
+    # qty and price are filled on item rows only
+    cols = ("date", "mode", "payment", "qty", "price", "total")
+    tree = ttk.Treeview(body, columns=cols, show="tree headings")
+    tree.heading("#0", text="Invoice / Item")
+    tree.column("#0", width=220, anchor="w")
+    for col, width in zip(cols, (160, 100, 100, 50, 80, 100)):
+        tree.heading(col, text=col.capitalize())
+        tree.column(col, width=width, anchor="w")
+    scrollbar = ttk.Scrollbar(body, orient="vertical", command=tree.yview)
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(side="left", fill="both", expand=True)
+
+    status_var = tk.StringVar(value="")
+    # keyset of the last loaded row; None once the oldest order is loaded
+    state = {"after": None, "more": True, "loading": False, "pending": False, "count": 0, "date_to": None}
+
+    def load_more():
+        if not state["more"] or state["loading"]:
+            return
+        state["loading"] = True
+        conn = open_history("restaurant.db")
+        rows = search_orders(conn, date_to=state["date_to"], after=state["after"])
+        conn.close()
+        for order_id, invoice, ts, mode, final_total, method in rows:
+            tree.insert("", tk.END, iid=str(order_id), text=invoice or str(order_id),
+                        values=(ts, mode, method or "", "", "", f"{float(final_total or 0):.2f}"))
+            # placeholder child so the row shows an expand arrow
+            tree.insert(str(order_id), tk.END, iid=f"{order_id}:pending", text="…")
+        state["count"] += len(rows)
+        if rows:
+            state["after"] = (rows[-1][2], rows[-1][0])
+        state["more"] = len(rows) == PAGE_SIZE
+        status_var.set(f"{state['count']} order(s) loaded" + ("" if state["more"] else " · end of history"))
+        state["loading"] = False
+
+    def load_if_near_bottom():
+        state["pending"] = False
+        # the view may have moved (or a page landed) since this was queued
+        if tree.yview()[1] > 0.9:
+            load_more()
+
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        # near the bottom: fetch the next page, queued at most once
+        if float(last) > 0.9 and state["more"] and not state["pending"]:
+            state["pending"] = True
+            win.after_idle(load_if_near_bottom)
+
+    def on_open(event=None):
+        order_id = tree.focus()
+        if not order_id or not tree.exists(f"{order_id}:pending"):
+            return
+        tree.delete(f"{order_id}:pending")
+        conn = open_history("restaurant.db")
+        items = load_order_items(conn, int(order_id))
+        conn.close()
+        for n, itm in enumerate(items):
+            tree.insert(order_id, tk.END, iid=f"{order_id}:{n}", text=f"  {itm['name']}",
+                        values=("", "", "", itm['quantity'], f"{itm['price']:.2f}",
+                                f"{itm['quantity'] * itm['price']:.2f}"))
+
+    def reload():
+        value = date_entry.get().strip()
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Input Error", "Enter the date as YYYY-MM-DD", parent=win)
+                return
+        tree.delete(*tree.get_children())
+        state.update(after=None, more=True, count=0, date_to=value or None)
+        load_more()
+
+    def reprint_selected(event=None):
+        sel = tree.selection()
+        if sel:
+            # a line row reprints its order
+            reprint_order(int(sel[0].split(":")[0]))
+
+    tree.configure(yscrollcommand=on_scroll)
+    tree.bind("<<TreeviewOpen>>", on_open)
+    tree.bind("<Return>", reprint_selected)
+
+    tk.Button(top, text="Go", command=reload, bg="#cce6ff").pack(side="left")
+    tk.Button(top, text="Reprint Bill", command=reprint_selected).pack(side="right")
+    tk.Label(win, textvariable=status_var).pack(anchor="w", padx=10, pady=5)
+
+    reload()
+
+
+# =========================
+# DAY CLOSE (admin)
+# =========================
+def open_day_close():
+    if not messagebox.askyesno("Close Day", "Close all orders since the last close?\nThis cannot be undone."):
+        return
+
+    conn = sqlite3.connect("restaurant.db", timeout=10)
+    try:
+        close = close_day(conn, closed_by=current_role)
+    finally:
+        conn.close()
+    if close is None:
+        messagebox.showinfo("Close Day", "No new orders since the last close.")
+        return
+
+    win = tk.Toplevel(root)
+    win.title(f"🧾 Z-Report #{close['id']}")
+    win.geometry("460x560")
+    text = tk.Text(win, width=52, height=30, font=("Courier New", 10))
+    text.pack(padx=10, pady=10)
+    text.insert(tk.END, format_z_report(close))
+    text.config(state="disabled")
+
 
 # =========================
 # MENU RENDERING
 # =========================
+def menu_photo(item_id, image_path):
+    """PhotoImage for a menu item, built once and cached in image_refs."""
+    if item_id in image_refs:
+        return image_refs[item_id]
+    photo = None
+    if item_id in menu_thumbs:
+        try:
+            photo = tk.PhotoImage(data=base64.b64encode(menu_thumbs[item_id]))
+        except tk.TclError:
+            photo = None
+    if photo is None and image_path:
+        # no pre-built thumbnail (db_setup not re-run): decode with PIL
+        full_path = os.path.join(IMAGE_FOLDER, os.path.basename(image_path))
+        if os.path.exists(full_path):
+            try:
+                img = Image.open(full_path).convert("RGB").resize((50, 50))
+                photo = ImageTk.PhotoImage(img)
+            except Exception:
+                photo = None
+    image_refs[item_id] = photo
+    return photo
+
+
 def render_menu(search_term: str, container: tk.Frame):
     """Render menu list with images + qty boxes, filtered by search_term."""
     for widget in container.winfo_children():
@@ -463,17 +774,9 @@ def render_menu(search_term: str, container: tk.Frame):
         # image
         img_label = tk.Label(row, bg="white", width=50)
         img_label.pack(side="left", padx=6)
-        full_path = None
-        if image_path:
-            full_path = os.path.join(IMAGE_FOLDER, os.path.basename(image_path))
-        if full_path and os.path.exists(full_path):
-            try:
-                img = Image.open(full_path).convert("RGB").resize((50, 50))
-                photo = ImageTk.PhotoImage(img)
-                image_refs.append(photo)
-                img_label.configure(image=photo)
-            except Exception:
-                img_label.configure(text="🖼️")
+        photo = menu_photo(item_id, image_path)
+        if photo is not None:
+            img_label.configure(image=photo)
         else:
             img_label.configure(text="🖼️")
 
@@ -481,12 +784,13 @@ def render_menu(search_term: str, container: tk.Frame):
         info = tk.Frame(row, bg="white")
         info.pack(side="left", padx=6)
         tk.Label(info, text=f"{name}", bg="white", font=("Arial", 12, "bold")).pack(anchor="w")
-        tk.Label(info, text=f"₹{float(price):.2f}  |  Tax: {float(tax_percent or 0):.1f}%", bg="white",
+        tk.Label(info, text=f"₹{float(price):.2f}  |  Tax: {price_book.tax_rate(item_id):.1f}%", bg="white",
                  font=("Arial", 10)).pack(anchor="w")
 
         # qty box
         qty_entry = tk.Entry(row, width=5, justify="center")
         qty_entry.pack(side="right", padx=5)
+        qty_entry.bind("<KeyRelease>", lambda e, i=item_id: on_qty_change(i))
         item_entries[item_id] = qty_entry
 
 
@@ -494,8 +798,8 @@ def render_menu(search_term: str, container: tk.Frame):
 # MAIN APP UI
 # =========================
 def main_app():
-    global order_mode, payment_method, subtotal_var, total_var
-    global discount_entry, tax_entry, receipt_text, table_buttons, table_status
+    global order_mode, payment_method, subtotal_var, total_var, promo_var, table_var
+    global discount_entry, coupon_entry, tax_entry, receipt_text, table_buttons, table_status
 
     root.deiconify()
     root.title("Kiruba Restaurant Billing System")
@@ -506,20 +810,17 @@ def main_app():
     payment_method = tk.StringVar(value="Cash")
     subtotal_var = tk.StringVar(value="0.00")
     total_var = tk.StringVar(value="0.00")
+    promo_var = tk.StringVar(value="")
+    table_var = tk.StringVar(value="")
 
     # ====== Logo at Top ======
     logo_frame = tk.Frame(root, bg="#f2f2f2")
     logo_frame.pack(pady=5)
 
-    try:
-        logo_image = Image.open("kiruba.png")
-        logo_image = logo_image.resize((120, 120), Image.LANCZOS)
-        logo_photo = ImageTk.PhotoImage(logo_image)
-
-        logo_label = tk.Label(logo_frame, image=logo_photo, bg="#f2f2f2")
-        logo_label.image = logo_photo
-        logo_label.pack()
-    except:
+    logo = logo_photo(120)
+    if logo is not None:
+        tk.Label(logo_frame, image=logo, bg="#f2f2f2").pack()
+    else:
         tk.Label(logo_frame, text="KIRUBA RESTAURANT",
                  font=("Arial", 20, "bold"), bg="#f2f2f2").pack()
 
@@ -562,6 +863,7 @@ def main_app():
 
     load_menu()
     render_menu("", menu_items_frame)
+    schedule_replica_refresh()
     search_var.trace_add("write", lambda *_: render_menu(search_var.get(), menu_items_frame))
 
     # ====== MIDDLE FRAME ======
@@ -599,6 +901,8 @@ def main_app():
     def toggle_table(table_num, duration=5):
         if table_status[table_num] == "free":
             table_status[table_num] = "occupied"
+            # seating a table picks it for the bill; freeing it later does not unpick it
+            table_var.set(str(table_num))
             table_buttons[table_num].config(bg="red", text=f"Table {table_num}\n🔴 Occupied")
             root.after(duration * 1000, lambda: free_table(table_num))
         else:
@@ -622,16 +926,25 @@ def main_app():
     ttk.Combobox(right_frame, values=["Dine-In", "Takeaway"],
                  textvariable=order_mode, state="readonly").pack(fill='x', padx=10, pady=10)
 
+    tk.Label(right_frame, text="Table (Dine-In):", bg="white", font=('Arial', 12)).pack(anchor='w', padx=10)
+    ttk.Combobox(right_frame, values=[""] + [str(t) for t in range(1, 21)],
+                 textvariable=table_var, state="readonly").pack(fill='x', padx=10, pady=(0, 10))
+
     tk.Label(right_frame, text="Discount (₹):", bg="white", font=('Arial', 12)).pack(anchor='w', padx=10, pady=(10, 0))
     discount_entry = tk.Entry(right_frame)
     discount_entry.pack(fill='x', padx=10)
 
+    tk.Label(right_frame, text="Coupon Code:", bg="white", font=('Arial', 12)).pack(anchor='w', padx=10, pady=(10, 0))
+    coupon_entry = tk.Entry(right_frame)
+    coupon_entry.pack(fill='x', padx=10)
+
     tk.Label(right_frame, text="Tax (₹):", bg="white", font=('Arial', 12)).pack(anchor='w', padx=10, pady=(10, 0))
     tax_entry = tk.Entry(right_frame)
     tax_entry.pack(fill='x', padx=10)
 
     tk.Label(right_frame, text="Subtotal:", bg="white", font=('Arial', 12)).pack(anchor='w', padx=10, pady=(20, 0))
     tk.Label(right_frame, textvariable=subtotal_var, bg="white", font=('Arial', 12, "bold")).pack(anchor='w', padx=10)
+    tk.Label(right_frame, textvariable=promo_var, bg="white", fg="green", font=('Arial', 10), justify='left').pack(anchor='w', padx=10)
 
     tk.Label(right_frame, text="Final Total:", bg="white", font=('Arial', 12)).pack(anchor='w', padx=10, pady=(10, 0))
     tk.Label(right_frame, textvariable=total_var, bg="white", font=('Arial', 12, "bold")).pack(anchor='w', padx=10)
@@ -643,6 +956,10 @@ def main_app():
     tk.Button(right_frame, text="Calculate Total", command=calculate_total, bg="#cce6ff").pack(fill='x', padx=10, pady=(15, 5))
     tk.Button(right_frame, text="Submit & Generate Bill", command=submit_order, bg="#004d00", fg="white").pack(fill='x', padx=10)
     tk.Button(right_frame, text="View Sales Report", command=open_sales_dashboard, bg="#ffcc00").pack(fill='x', padx=10, pady=10)
+    tk.Button(right_frame, text="Order History", command=open_order_history, bg="#d9f2d9").pack(fill='x', padx=10, pady=(0, 10))
+    if current_role == "admin":
+        tk.Button(right_frame, text="Search Orders", command=open_order_search, bg="#e6ccff").pack(fill='x', padx=10)
+        tk.Button(right_frame, text="Close Day (Z-Report)", command=open_day_close, bg="#ffb3b3").pack(fill='x', padx=10, pady=10)
 
 # =========================
 # LOGIN FLOW
@@ -654,15 +971,10 @@ def show_login():
     login_win.grab_set()  # modal
 
     # ====== Logo ======
-    try:
-        logo_image = Image.open("kiruba.png")
-        logo_image = logo_image.resize((100, 100), Image.LANCZOS)
-        logo_photo = ImageTk.PhotoImage(logo_image)
-
-        logo_label = tk.Label(login_win, image=logo_photo, bg="white")
-        logo_label.image = logo_photo
-        logo_label.pack(pady=5)
-    except Exception as e:
+    logo = logo_photo(100)
+    if logo is not None:
+        tk.Label(login_win, image=logo, bg="white").pack(pady=5)
+    else:
         tk.Label(login_win, text="KIRUBA RESTAURANT", font=("Arial", 16, "bold"), bg="white").pack(pady=5)
 
     tk.Label(login_win, text="Login", font=("Arial", 16, "bold")).pack(pady=10)
@@ -680,6 +992,7 @@ def show_login():
     ttk.Combobox(login_win, textvariable=role_var, values=["admin", "cashier"], state="readonly").pack(pady=5)
 
     def do_login():
+        global current_role
         username = username_entry.get().strip()
         password = password_entry.get().strip()
         role = role_var.get()
@@ -691,6 +1004,7 @@ def show_login():
         conn.close()
 
         if ok:
+            current_role = role
             messagebox.showinfo("Success", f"Welcome {role.capitalize()}!")
             login_win.destroy()
             main_app()
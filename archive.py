@@ -0,0 +1,337 @@
+import os
+import sqlite3
+import struct
+import zlib
+import shutil
+from datetime import datetime
+
+# =========================
+# BILL ARCHIVE
+# =========================
+# Bills are appended to one segment file per day (bills/YYYY/MM/YYYY-MM-DD.seg)
+# instead of being written as loose files into the working directory.
+# The `bill_archive` table maps (invoice_number, kind) -> segment/offset/length,
+# so a lookup is one index probe plus one seek, and a backup is a sequential
+# copy of the segment files.
+#
+# Every record carries its own header, so the index can be rebuilt by
+# scanning the segments (see rebuild_index). When retention moves old orders
+# to restaurant_archive.db their bill_archive rows go with them; lookups fall
+# back to the archive DB's index.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.path.join(BASE_DIR, "bills")
+EXPORT_DIR = os.path.join(BASE_DIR, "exports")
+DB_PATH = "restaurant.db"
+
+MAGIC = b"BILL"
+# magic, kind, invoice length, payload length, crc32
+HEADER = struct.Struct("<4sBHII")
+
+KINDS = {"pdf": 1, "csv": 2, "json": 3}
+KIND_NAMES = {v: k for k, v in KINDS.items()}
+FILE_NAMES = {
+    "pdf": "bill_{invoice}.pdf",
+    "csv": "bill_order_{invoice}.csv",
+    "json": "bill_order_{invoice}.json",
+}
+
+
+def init_archive(conn, schema="main"):
+    """Create the archive index table if missing."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.bill_archive (
+            invoice_number TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            segment TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            crc32 INTEGER NOT NULL,
+            stored_on TEXT,
+            PRIMARY KEY (invoice_number, kind)
+        ) WITHOUT ROWID
+    """)
+
+
+def _find_bill(conn, invoice_number, kind, db_path):
+    """(segment, offset, length, crc32) for a bill: hot index first, then the archive DB."""
+    sql = "SELECT segment, offset, length, crc32 FROM bill_archive WHERE invoice_number = ? AND kind = ?"
+    row = conn.execute(sql, (invoice_number, kind)).fetchone()
+    if row:
+        return row
+    # imported here: retention imports this module
+    from retention import archive_path_for
+    path = archive_path_for(db_path)
+    if not os.path.exists(path):
+        return None
+    arch = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return arch.execute(sql, (invoice_number, kind)).fetchone()
+    except sqlite3.OperationalError:
+        # archived before bill index rows were moved: no table yet
+        return None
+    finally:
+        arch.close()
+
+
+def segment_for(when):
+    """Relative segment path for a datetime (one segment per day)."""
+    return os.path.join(when.strftime("%Y"), when.strftime("%m"), when.strftime("%Y-%m-%d") + ".seg")
+
+
+def _append_record(path, invoice_number, kind, data):
+    """Append one record to a segment; returns the payload offset."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    inv = invoice_number.encode("utf-8")
+    header = HEADER.pack(MAGIC, KINDS[kind], len(inv), len(data), zlib.crc32(data))
+    with open(path, "ab") as f:
+        start = f.seek(0, os.SEEK_END)
+        f.write(header + inv + data)
+        f.flush()
+        os.fsync(f.fileno())
+    return start + HEADER.size + len(inv)
+
+
+def store_bill(invoice_number, kind, data, when=None, db_path=DB_PATH, root=ARCHIVE_DIR, conn=None,
+               skip_existing=False):
+    """Append a bill (bytes or str) to today's segment and index it.
+
+    With skip_existing, a bill already in the index is left as is (nothing
+    is appended) and its existing location is returned.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown bill kind '{kind}'")
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    when = when or datetime.now()
+    segment = segment_for(when)
+
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        init_archive(conn)
+        # the write lock serialises appenders across cashier processes
+        conn.execute("BEGIN IMMEDIATE")
+        if skip_existing:
+            row = _find_bill(conn, invoice_number, kind, db_path)
+            if row:
+                conn.rollback()
+                return row[0], row[1]
+        offset = _append_record(os.path.join(root, segment), invoice_number, kind, data)
+        conn.execute("""
+            INSERT OR REPLACE INTO bill_archive
+                (invoice_number, kind, segment, offset, length, crc32, stored_on)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (invoice_number, kind, segment, offset, len(data), zlib.crc32(data),
+              when.strftime("%Y-%m-%d %H:%M:%S")))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if own:
+            conn.close()
+    return segment, offset
+
+
+def load_bill(invoice_number, kind, db_path=DB_PATH, root=ARCHIVE_DIR):
+    """Return the stored bytes for a bill, or None if it was never archived."""
+    conn = sqlite3.connect(db_path)
+    try:
+        init_archive(conn)
+        row = _find_bill(conn, invoice_number, kind, db_path)
+    finally:
+        conn.close()
+    if not row:
+        return None
+
+    segment, offset, length, crc = row
+    with open(os.path.join(root, segment), "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    if len(data) != length or zlib.crc32(data) != crc:
+        raise IOError(f"Archived {kind} for {invoice_number} is corrupt ({segment}@{offset})")
+    return data
+
+
+def export_bill(invoice_number, kind, dest_dir=EXPORT_DIR, db_path=DB_PATH, root=ARCHIVE_DIR):
+    """Copy an archived bill out to a regular file. Returns the path or None."""
+    data = load_bill(invoice_number, kind, db_path, root)
+    if data is None:
+        return None
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, FILE_NAMES[kind].format(invoice=invoice_number))
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+# =========================
+# MAINTENANCE
+# =========================
+def iter_segments(root=ARCHIVE_DIR):
+    """Yield segment paths relative to root, oldest first."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(".seg"):
+                yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+def iter_records(segment_path):
+    """Yield (invoice_number, kind, payload_offset, length, crc32) for a segment."""
+    with open(segment_path, "rb") as f:
+        pos = 0
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            magic, kind, inv_len, length, crc = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise IOError(f"Bad record header in {segment_path} at {pos}")
+            invoice_number = f.read(inv_len).decode("utf-8")
+            offset = pos + HEADER.size + inv_len
+            f.seek(length, os.SEEK_CUR)
+            pos = offset + length
+            yield invoice_number, KIND_NAMES[kind], offset, length, crc
+
+
+def rebuild_index(db_path=DB_PATH, root=ARCHIVE_DIR):
+    """Re-create bill_archive from the segment files. Later records win.
+
+    Bills of orders retention has moved are indexed in the archive DB, as
+    retention leaves them. stored_on is kept from the old index where it
+    points at the same record; otherwise it is the day of the segment.
+    """
+    # imported here: retention imports this module
+    from retention import archive_path_for
+
+    conn = sqlite3.connect(db_path)
+    init_archive(conn)
+    schemas = ["main"]
+    archive_path = archive_path_for(db_path)
+    if os.path.exists(archive_path):
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        if conn.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'orders'").fetchone():
+            init_archive(conn, "archive")
+            schemas.append("archive")
+    conn.execute("""
+        CREATE TEMP TABLE rebuilt (
+            invoice_number TEXT, kind TEXT, segment TEXT, offset INTEGER, length INTEGER, crc32 INTEGER,
+            stored_on TEXT, PRIMARY KEY (invoice_number, kind)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TEMP TABLE old_stored (
+            invoice_number TEXT, kind TEXT, segment TEXT, offset INTEGER, stored_on TEXT,
+            PRIMARY KEY (invoice_number, kind)
+        ) WITHOUT ROWID
+    """)
+    try:
+        for schema in schemas:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO temp.old_stored
+                SELECT invoice_number, kind, segment, offset, stored_on FROM {schema}.bill_archive
+                WHERE stored_on IS NOT NULL
+            """)
+            conn.execute(f"DELETE FROM {schema}.bill_archive")
+        count = 0
+        for segment in iter_segments(root):
+            day = os.path.basename(segment)[:-len(".seg")] + " 00:00:00"
+            rows = [(inv, kind, segment, offset, length, crc, day)
+                    for inv, kind, offset, length, crc in iter_records(os.path.join(root, segment))]
+            conn.executemany("""
+                INSERT OR REPLACE INTO temp.rebuilt
+                    (invoice_number, kind, segment, offset, length, crc32, stored_on)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            count += len(rows)
+        rebuilt = """
+            SELECT r.invoice_number, r.kind, r.segment, r.offset, r.length, r.crc32,
+                   COALESCE(s.stored_on, r.stored_on)
+            FROM temp.rebuilt r LEFT JOIN temp.old_stored s USING (invoice_number, kind, segment, offset)
+        """
+        archived = "r.invoice_number IN (SELECT invoice_number FROM archive.orders WHERE invoice_number IS NOT NULL)"
+        if "archive" in schemas:
+            conn.execute(f"INSERT INTO archive.bill_archive {rebuilt} WHERE {archived}")
+            conn.execute(f"INSERT INTO main.bill_archive {rebuilt} WHERE NOT {archived}")
+        else:
+            conn.execute(f"INSERT INTO main.bill_archive {rebuilt}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return count
+
+
+def backup_archive(dest_dir, root=ARCHIVE_DIR):
+    """Copy segments to dest_dir. Segments are append-only, so unchanged ones are skipped."""
+    copied = 0
+    for segment in iter_segments(root):
+        src = os.path.join(root, segment)
+        dst = os.path.join(dest_dir, segment)
+        if os.path.exists(dst) and os.path.getsize(dst) == os.path.getsize(src):
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copyfile(src, dst)
+        copied += 1
+    return copied
+
+
+def import_loose_files(folder=".", db_path=DB_PATH, root=ARCHIVE_DIR, remove=False):
+    """Move old bill_*.pdf / bill_order_*.csv|json files into the archive."""
+    imported = 0
+    for name in sorted(os.listdir(folder)):
+        base, ext = os.path.splitext(name)
+        kind = ext.lstrip(".").lower()
+        if kind not in KINDS:
+            continue
+        if base.startswith("bill_order_"):
+            invoice_number = base[len("bill_order_"):]
+        elif base.startswith("bill_"):
+            invoice_number = base[len("bill_"):]
+        else:
+            continue
+        path = os.path.join(folder, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        store_bill(invoice_number, kind, data,
+                   when=datetime.fromtimestamp(os.path.getmtime(path)),
+                   db_path=db_path, root=root)
+        if remove:
+            os.remove(path)
+        imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kiruba bill archive maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("export", help="copy a bill out of the archive")
+    p.add_argument("invoice")
+    p.add_argument("--kind", choices=sorted(KINDS), default="pdf")
+    p.add_argument("--dest", default=EXPORT_DIR)
+    p = sub.add_parser("backup", help="incrementally copy segments to a folder")
+    p.add_argument("dest")
+    sub.add_parser("reindex", help="rebuild the invoice index from the segments")
+    p = sub.add_parser("import", help="move loose bill files into the archive")
+    p.add_argument("folder", nargs="?", default=".")
+    p.add_argument("--remove", action="store_true", help="delete the loose files afterwards")
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        path = export_bill(args.invoice, args.kind, args.dest)
+        print(path or f"[WARNING] {args.invoice} ({args.kind}) not in archive")
+    elif args.cmd == "backup":
+        print(f"[INFO] Copied {backup_archive(args.dest)} segment(s)")
+    elif args.cmd == "reindex":
+        print(f"[INFO] Indexed {rebuild_index()} record(s)")
+    elif args.cmd == "import":
+        print(f"[INFO] Imported {import_loose_files(args.folder, remove=args.remove)} file(s)")
@@ -0,0 +1,98 @@
+import io
+import os
+import sqlite3
+
+# =========================
+# MENU IMAGE ASSETS
+# =========================
+# db_setup decodes each menu PNG once and stores small, ready-to-display PNG
+# thumbnails in the `menu_images` table. The app then loads every thumbnail
+# for a size with one query and hands the bytes straight to tk.PhotoImage,
+# so no PIL decoding or resampling happens at runtime.
+#
+# Pillow is only needed for the build step.
+
+THUMB_SIZES = (50, 100)
+
+
+def init_assets(conn):
+    """Create the thumbnail table if missing."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS menu_images (
+            image_file TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            source_mtime INTEGER NOT NULL,
+            source_size INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (image_file, size)
+        )
+    """)
+
+
+def _thumbnail_png(img, size):
+    buf = io.BytesIO()
+    img.resize((size, size)).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def build_thumbnails(conn, image_dir, sizes=THUMB_SIZES):
+    """Rebuild thumbnails for new/changed images. Returns (built, skipped, removed)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("[WARNING] Pillow not installed; skipping thumbnail build.")
+        return 0, 0, 0
+
+    init_assets(conn)
+    stored = {}
+    for image_file, size, mtime, fsize in conn.execute(
+            "SELECT image_file, size, source_mtime, source_size FROM menu_images"):
+        stored[(image_file, size)] = (mtime, fsize)
+
+    wanted = {r[0] for r in conn.execute(
+        "SELECT DISTINCT image_path FROM menu_items WHERE image_path IS NOT NULL")}
+
+    rows, built, skipped = [], 0, 0
+    for image_file in sorted(wanted):
+        path = os.path.join(image_dir, os.path.basename(image_file))
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamp = (st.st_mtime_ns, st.st_size)
+        todo = [s for s in sizes if stored.get((image_file, s)) != stamp]
+        if not todo:
+            skipped += 1
+            continue
+        try:
+            with Image.open(path) as src:
+                img = src.convert("RGB")
+        except Exception as e:
+            print(f"[WARNING] Could not decode {path}: {e}")
+            continue
+        for size in todo:
+            rows.append((image_file, size, stamp[0], stamp[1], _thumbnail_png(img, size)))
+        built += 1
+
+    stale = [key for key in stored if key[0] not in wanted or key[1] not in sizes]
+    with conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO menu_images (image_file, size, source_mtime, source_size, data)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        conn.executemany("DELETE FROM menu_images WHERE image_file = ? AND size = ?", stale)
+    return built, skipped, len(stale)
+
+
+def load_thumbnails(conn, size):
+    """Return {menu item id: PNG bytes} for one thumbnail size."""
+    try:
+        rows = conn.execute("""
+            SELECT m.id, i.data
+            FROM menu_items m
+            JOIN menu_images i ON i.image_file = m.image_path AND i.size = ?
+        """, (size,)).fetchall()
+    except sqlite3.OperationalError:
+        # older DB without the asset table: caller falls back to PIL
+        return {}
+    return dict(rows)
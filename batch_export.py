@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+from multiprocessing import Pool, cpu_count
+
+from billing import render_pdf_bill, render_bill_csv, render_bill_json
+from archive import FILE_NAMES, init_archive, store_bill
+from orders import DB_PATH, fetch_order, invoice_order_id, load_order_items, select_order_ids
+from retention import history_schemas, open_history
+
+# =========================
+# BATCH REPRINT / RE-EXPORT
+# =========================
+# Workers rebuild each bill from the DB and render it (the CPU-bound part);
+# only the parent process writes, either into the bill archive or into an
+# output folder, so the archive keeps a single appender. In archive mode the
+# parent drops bills that are already archived before handing out work, so
+# a re-run only renders what is missing. An order that fails to render is
+# reported at the end instead of stopping the batch.
+
+_conn = None
+
+
+def _init_worker(db_path):
+    global _conn
+    _conn = open_history(db_path, read_only=True)
+
+
+def _render_order(task):
+    """Worker: render one order in the given formats.
+
+    Returns (order_id, (invoice, date, {kind: bytes}) or None, error or None).
+    """
+    order_id, formats = task
+    try:
+        order = fetch_order(_conn, order_id)
+        if order is None:
+            return order_id, None, None
+        items = load_order_items(_conn, order_id)
+        invoice = order['invoice_number']
+        totals = order['totals']
+        date = order['timestamp'] or ""
+        out = {}
+        if "pdf" in formats:
+            out["pdf"] = render_pdf_bill(invoice, items, totals, date[:16])
+        if "csv" in formats:
+            out["csv"] = render_bill_csv(items, totals).encode("utf-8")
+        if "json" in formats:
+            out["json"] = render_bill_json(invoice, items, totals, date).encode("utf-8")
+    except Exception as e:
+        return order_id, None, f"{type(e).__name__}: {e}"
+    return order_id, (invoice, date, out), None
+
+
+def _warm_font_cache():
+    """Render one throwaway PDF so fpdf writes its font cache before the workers start.
+
+    Otherwise every worker writes and reads DejaVuSans*.pkl at once on a cold
+    checkout and some of them load a half-written file.
+    """
+    render_pdf_bill("ORD-0000", [], {'subtotal': 0, 'discount': 0, 'tax': 0, 'final_total': 0})
+
+
+def _missing_bills(db_path, order_ids, formats):
+    """[(order_id, formats not archived yet), ...]; fully archived orders are left out."""
+    conn = open_history(db_path, read_only=True)
+    try:
+        conn.execute("CREATE TEMP TABLE batch_ids (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT OR IGNORE INTO batch_ids VALUES (?)", ((i,) for i in order_ids))
+        archived = {}
+        schemas = history_schemas(conn)
+        # a bill's index row can sit in either DB until retention adopts it
+        for order_schema in schemas:
+            for bill_schema in schemas:
+                try:
+                    rows = conn.execute(f"""
+                        SELECT b.id, ba.kind
+                        FROM batch_ids b
+                        JOIN {order_schema}.orders o ON o.id = b.id
+                        JOIN {bill_schema}.bill_archive ba ON ba.invoice_number = o.invoice_number
+                    """).fetchall()
+                except sqlite3.OperationalError:
+                    # no bill_archive table in that DB yet
+                    continue
+                for order_id, kind in rows:
+                    archived.setdefault(order_id, set()).add(kind)
+    finally:
+        conn.close()
+    tasks = []
+    for order_id in order_ids:
+        todo = tuple(f for f in formats if f not in archived.get(order_id, ()))
+        if todo:
+            tasks.append((order_id, todo))
+    return tasks
+
+
+def batch_export(order_ids, formats=("pdf", "csv", "json"), out_dir=None, db_path=DB_PATH,
+                 workers=None, chunksize=None, progress=None):
+    """Render many orders in a process pool.
+
+    Bills go into the archive (skipping ones already there), or into out_dir
+    as regular files when given. progress(done, total) is called as results
+    come back. Returns (orders rendered, [(order_id, error), ...]).
+    """
+    formats = tuple(formats)
+    if out_dir:
+        tasks = [(order_id, formats) for order_id in order_ids]
+    else:
+        tasks = _missing_bills(db_path, order_ids, formats)
+    total = len(tasks)
+    if not total:
+        return 0, []
+    if any("pdf" in todo for _, todo in tasks):
+        _warm_font_cache()
+    workers = workers or cpu_count()
+    # a few chunks per worker keeps cores busy without per-order IPC
+    chunksize = chunksize or max(1, min(64, total // (workers * 4) or 1))
+
+    conn = None
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    else:
+        conn = sqlite3.connect(db_path, timeout=30)
+        init_archive(conn)
+
+    done, failed = 0, []
+    try:
+        with Pool(workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+            for order_id, result, error in pool.imap_unordered(_render_order, tasks, chunksize):
+                done += 1
+                if error:
+                    failed.append((order_id, error))
+                elif result is not None:
+                    invoice, date, out = result
+                    for kind, data in out.items():
+                        if out_dir:
+                            with open(os.path.join(out_dir, FILE_NAMES[kind].format(invoice=invoice)), "wb") as f:
+                                f.write(data)
+                        else:
+                            try:
+                                when = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+                            except ValueError:
+                                when = None
+                            store_bill(invoice, kind, data, when=when, db_path=db_path, conn=conn,
+                                       skip_existing=True)
+                if progress:
+                    progress(done, total)
+    finally:
+        if conn is not None:
+            conn.close()
+    return done, failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reprint / re-export bills for a date or invoice range")
+    parser.add_argument("--from-date", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--to-date", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--from-invoice", help="e.g. ORD-2025-0001")
+    parser.add_argument("--to-invoice", help="e.g. ORD-2025-0999")
+    parser.add_argument("--formats", default="pdf,csv,json", help="comma separated: pdf,csv,json")
+    parser.add_argument("--out", help="write files to this folder instead of the bill archive")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    for f in formats:
+        if f not in FILE_NAMES:
+            parser.error(f"unknown format '{f}'")
+    for bound in (args.from_invoice, args.to_invoice):
+        if bound:
+            try:
+                invoice_order_id(bound)
+            except ValueError as e:
+                parser.error(str(e))
+
+    conn = open_history(args.db)
+    ids = select_order_ids(conn, args.from_date, args.to_date, args.from_invoice, args.to_invoice)
+    conn.close()
+    print(f"[INFO] {len(ids)} order(s) selected")
+
+    started = time.perf_counter()
+
+    def report(done, total):
+        if done == total or done % 100 == 0:
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            print(f"[INFO] {done}/{total} bills ({rate:.1f}/s)", flush=True)
+
+    done, failed = batch_export(ids, formats, args.out, args.db, args.workers, args.chunksize, report)
+    if not args.out and done < len(ids):
+        print(f"[INFO] {len(ids) - done} order(s) already archived, skipped")
+    for order_id, error in failed:
+        print(f"[WARNING] Order {order_id} failed: {error}")
+    if failed:
+        print(f"[WARNING] {len(failed)} order(s) failed: {', '.join(str(i) for i, _ in failed)}")
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s")
@@ -1,6 +1,7 @@
 from fpdf import FPDF
 from datetime import datetime
 import csv
+import io
 import json
 import os
 
@@ -8,7 +9,8 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FONT_FILE = os.path.join(BASE_DIR, "DejaVuSans.ttf")
 
-def generate_pdf_bill(order_id, items, totals, save_path):
+def render_pdf_bill(order_id, items, totals, date=None):
+    """Build the PDF bill in memory and return its bytes."""
     pdf = FPDF()
     pdf.add_page()
 
@@ -19,9 +21,10 @@ def generate_pdf_bill(order_id, items, totals, save_path):
     pdf.add_font('DejaVu', "", FONT_FILE, uni=True)
     pdf.set_font('DejaVu', "", 12)
 
+    date = date or datetime.now().strftime('%Y-%m-%d %H:%M')
     pdf.cell(200, 10, txt="Kiruba Restaurant - Bill", ln=1, align="C")
     pdf.cell(200, 10, txt=f"Order ID: {order_id}", ln=2, align="C")
-    pdf.cell(200, 10, txt=f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=3, align="C")
+    pdf.cell(200, 10, txt=f"Date: {date}", ln=3, align="C")
     pdf.ln(10)
 
     for item in items:
@@ -34,11 +37,57 @@ def generate_pdf_bill(order_id, items, totals, save_path):
     pdf.ln(10)
     pdf.cell(200, 10, txt=f"Subtotal: ₹{totals['subtotal']}", ln=1)
     pdf.cell(200, 10, txt=f"Discount: ₹{totals['discount']}", ln=1)
+    for name, off in totals.get('promotions', ()):
+        pdf.cell(200, 10, txt=f"    {name}: -₹{off:.2f}", ln=1)
     pdf.cell(200, 10, txt=f"Tax: ₹{totals['tax']}", ln=1)
     pdf.set_font('DejaVu', "", 12)
     pdf.cell(200, 10, txt=f"Final Total: ₹{totals['final_total']}", ln=1)
 
-    pdf.output(save_path)
+    # fpdf 1.x returns a latin-1 str, fpdf2 returns a bytearray
+    data = pdf.output(dest='S')
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    return bytes(data)
+
+
+def generate_pdf_bill(order_id, items, totals, save_path, date=None):
+    data = render_pdf_bill(order_id, items, totals, date)
+    with open(save_path, "wb") as f:
+        f.write(data)
+    return save_path
+
+
+def render_bill_csv(items, totals):
+    """Return the CSV bill as text."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["Item", "Quantity", "Price", "Total"])
+    for item in items:
+        writer.writerow([
+            item['name'],
+            item['quantity'],
+            f"{item['price']:.2f}",
+            f"{item['quantity'] * item['price']:.2f}"
+        ])
+    writer.writerow([])
+    writer.writerow(["Subtotal", f"{totals['subtotal']:.2f}"])
+    writer.writerow(["Discount", f"{totals['discount']:.2f}"])
+    for name, off in totals.get('promotions', ()):
+        writer.writerow(["Promotion", name, f"-{off:.2f}"])
+    writer.writerow(["Tax", f"{totals['tax']:.2f}"])
+    writer.writerow(["Final Total", f"{totals['final_total']:.2f}"])
+    return buf.getvalue()
+
+
+def render_bill_json(order_id, items, totals, date=None):
+    """Return the JSON bill as text."""
+    data = {
+        "order_id": order_id,
+        "date": date or datetime.now().strftime('%Y-%m-%d %H:%M'),
+        "items": items,
+        "totals": totals
+    }
+    return json.dumps(data, indent=4)
 
 
 def export_bill_csv(order_id, items, totals, filename=None):
@@ -46,37 +95,15 @@ def export_bill_csv(order_id, items, totals, filename=None):
         filename = f"bill_order_{order_id}.csv"
 
     with open(filename, mode="w", newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Item", "Quantity", "Price", "Total"])
-        for item in items:
-            writer.writerow([
-                item['name'],
-                item['quantity'],
-                f"{item['price']:.2f}",
-                f"{item['quantity'] * item['price']:.2f}"
-            ])
-        writer.writerow([])
-        writer.writerow(["Subtotal", f"{totals['subtotal']:.2f}"])
-        writer.writerow(["Discount", f"{totals['discount']:.2f}"])
-        writer.writerow(["Tax", f"{totals['tax']:.2f}"])
-        writer.writerow(["Final Total", f"{totals['final_total']:.2f}"])
+        f.write(render_bill_csv(items, totals))
     return filename
 
 
-def export_bill_json(order_id, items, totals, filename=None):
+def export_bill_json(order_id, items, totals, filename=None, date=None):
     if filename is None:
         filename = f"bill_order_{order_id}.json"
 
-    data = {
-        "order_id": order_id,
-        "date": datetime.now().strftime('%Y-%m-%d %H:%M'),
-        "items": items,
-        "totals": totals
-    }
-
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+        f.write(render_bill_json(order_id, items, totals, date))
 
     return filename
-
-
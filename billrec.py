@@ -0,0 +1,430 @@
+import csv
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+
+from billing import render_bill_csv, render_bill_json
+from orders import fetch_order, select_order_ids
+from retention import open_history
+
+# =========================
+# COMPACT BILL RECORDS (.brec)
+# =========================
+# A binary alternative to the JSON/CSV bill exports for bulk storage and
+# analysis. A .brec file is a small file header followed by records
+# appended back to back:
+#
+#   header  order id, invoice (16 bytes), timestamp as YYYYMMDDHHMMSS,
+#           mode code, payment code, line count, subtotal / discount /
+#           tax / final total in paise                          (48 bytes)
+#   lines   menu item id, quantity, unit price in paise        (10 bytes each)
+#
+# Amounts are integers (no float formatting to parse back) and items are
+# menu ids (names come from menu_items when converting back). BillReader
+# maps the file and decodes fields in place with struct.unpack_from, so
+# scanning millions of bills needs no per-record parsing or copying;
+# iter_headers() skips the lines entirely for totals-only scans.
+#
+# Files are append-only. A record cut short by a crash at the end of the
+# file is ignored by the reader and overwritten by the next append.
+
+DB_PATH = "restaurant.db"
+
+MAGIC = b"BREC"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHH")          # magic, version, reserved
+RECORD = struct.Struct("<I16sQBBHiiii")       # see above
+LINE = struct.Struct("<IHi")
+
+MODES = ("Dine-In", "Takeaway")
+METHODS = ("Cash", "Card", "UPI")
+UNKNOWN = 255
+
+
+def _code(value, names):
+    return names.index(value) if value in names else UNKNOWN
+
+
+def _name(code, names):
+    return names[code] if code < len(names) else None
+
+
+def _paise(rupees):
+    return int(round(float(rupees or 0) * 100))
+
+
+def _stamp(text):
+    """'YYYY-MM-DD HH:MM[:SS]' -> YYYYMMDDHHMMSS as an int (0 if missing)."""
+    if not text:
+        return 0
+    digits = "".join(ch for ch in text if ch.isdigit())
+    return int(digits.ljust(14, "0")[:14])
+
+
+def _unstamp(value):
+    if not value:
+        return None
+    s = f"{value:014d}"
+    return f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[8:10]}:{s[10:12]}:{s[12:14]}"
+
+
+# =========================
+# RECORDS
+# =========================
+class BillLine:
+    __slots__ = ("item_id", "quantity", "price")
+
+    def __init__(self, item_id, quantity, price):
+        self.item_id = item_id      # menu_items.id
+        self.quantity = quantity
+        self.price = price          # unit price, paise
+
+    def __repr__(self):
+        return f"BillLine({self.item_id}, {self.quantity}, {self.price})"
+
+
+class BillRecord:
+    __slots__ = ("order_id", "invoice", "timestamp", "mode", "payment_method",
+                 "subtotal", "discount", "tax", "final_total", "lines")
+
+    def __init__(self, order_id, invoice, timestamp, mode, payment_method,
+                 subtotal, discount, tax, final_total, lines=()):
+        self.order_id = order_id
+        self.invoice = invoice
+        self.timestamp = timestamp          # 'YYYY-MM-DD HH:MM:SS' or None
+        self.mode = mode
+        self.payment_method = payment_method
+        self.subtotal = subtotal            # amounts in paise
+        self.discount = discount
+        self.tax = tax
+        self.final_total = final_total
+        self.lines = list(lines)
+
+    def __repr__(self):
+        return f"BillRecord({self.order_id}, {self.invoice!r}, {len(self.lines)} line(s), {self.final_total})"
+
+    def pack(self):
+        invoice = (self.invoice or "").encode("ascii")
+        if len(invoice) > 16:
+            raise ValueError(f"invoice number too long for a bill record: {self.invoice!r}")
+        out = [RECORD.pack(self.order_id, invoice, _stamp(self.timestamp),
+                           _code(self.mode, MODES), _code(self.payment_method, METHODS),
+                           len(self.lines), self.subtotal, self.discount, self.tax, self.final_total)]
+        out.extend(LINE.pack(l.item_id, l.quantity, l.price) for l in self.lines)
+        return b"".join(out)
+
+    def totals(self):
+        """Totals dict in rupees, as used by billing.py."""
+        return {
+            'subtotal': self.subtotal / 100,
+            'discount': self.discount / 100,
+            'tax': self.tax / 100,
+            'final_total': self.final_total / 100,
+        }
+
+
+# =========================
+# WRITER / READER
+# =========================
+class BillWriter:
+    """Append records to a .brec file (created with a file header if new)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "a+b")
+        self.f.seek(0, os.SEEK_END)
+        if self.f.tell() == 0:
+            self.f.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        else:
+            end = _valid_end(path)
+            if end != self.f.tell():
+                # drop a torn record left by a crash
+                self.f.truncate(end)
+        self.count = 0
+
+    def append(self, record):
+        self.f.write(record.pack())
+        self.count += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(buf, path):
+    if len(buf) < FILE_HEADER.size:
+        raise ValueError(f"{path}: not a bill record file")
+    magic, version, _ = FILE_HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a bill record file (or unsupported version)")
+
+
+def _valid_end(path):
+    """Offset just past the last complete record."""
+    with BillReader(path) as reader:
+        end = FILE_HEADER.size
+        for end in reader.offsets():
+            pass
+        return end
+
+
+class BillReader:
+    """Memory-mapped, read-only view of a .brec file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "rb")
+        size = os.fstat(self.f.fileno()).st_size
+        self.buf = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        _check_header(self.buf, path)
+        self.size = size
+
+    def offsets(self):
+        """End offset of each complete record, in file order."""
+        buf, size, pos = self.buf, self.size, FILE_HEADER.size
+        rec, line = RECORD.size, LINE.size
+        while pos + rec <= size:
+            n = struct.unpack_from("<H", buf, pos + 30)[0]
+            end = pos + rec + n * line
+            if end > size:
+                break
+            yield end
+            pos = end
+
+    def iter_headers(self):
+        """(order_id, invoice bytes, stamp, mode, payment, n_lines, subtotal, discount, tax, final_total)
+        tuples, without touching the lines."""
+        buf, size, pos = self.buf, self.size, FILE_HEADER.size
+        unpack, rec, line = RECORD.unpack_from, RECORD.size, LINE.size
+        while pos + rec <= size:
+            head = unpack(buf, pos)
+            end = pos + rec + head[5] * line
+            if end > size:
+                break
+            yield head
+            pos = end
+
+    def __iter__(self):
+        buf, size, pos = self.buf, self.size, FILE_HEADER.size
+        unpack, unpack_line, rec, line = RECORD.unpack_from, LINE.unpack_from, RECORD.size, LINE.size
+        while pos + rec <= size:
+            (order_id, invoice, stamp, mode, method, n,
+             subtotal, discount, tax, final_total) = unpack(buf, pos)
+            end = pos + rec + n * line
+            if end > size:
+                break
+            lines = [BillLine(*unpack_line(buf, off)) for off in range(pos + rec, end, line)]
+            yield BillRecord(order_id, invoice.rstrip(b"\0").decode("ascii"), _unstamp(stamp),
+                             _name(mode, MODES), _name(method, METHODS),
+                             subtotal, discount, tax, final_total, lines)
+            pos = end
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =========================
+# CONVERTERS
+# =========================
+def record_from_order(conn, order_id):
+    """BillRecord for a stored order (conn from retention.open_history()), or None."""
+    order = fetch_order(conn, order_id)
+    if order is None:
+        return None
+    lines = [BillLine(item_id, qty, _paise(price)) for item_id, qty, price in conn.execute("""
+        SELECT oi.item_id, oi.quantity, COALESCE(oi.price, mi.price, 0)
+        FROM all_order_items oi
+        LEFT JOIN menu_items mi ON mi.id = oi.item_id
+        WHERE oi.order_id = ?
+        ORDER BY oi.id
+    """, (order_id,))]
+    t = order['totals']
+    return BillRecord(order['id'], order['invoice_number'], order['timestamp'], order['mode'],
+                      order['payment_method'], _paise(t['subtotal']), _paise(t['discount']),
+                      _paise(t['tax']), _paise(t['final_total']), lines)
+
+
+def record_items(record, menu_by_id):
+    """Bill item dicts ({'name', 'price', 'quantity'}) with names from the menu."""
+    return [{'name': menu_by_id[l.item_id][1] if l.item_id in menu_by_id else f"Item #{l.item_id}",
+             'price': l.price / 100, 'quantity': l.quantity} for l in record.lines]
+
+
+def to_bill_json(record, menu_by_id):
+    """Same document as billing.render_bill_json()."""
+    return render_bill_json(record.invoice, record_items(record, menu_by_id), record.totals(), record.timestamp)
+
+
+def to_bill_csv(record, menu_by_id):
+    """Same text as billing.render_bill_csv()."""
+    return render_bill_csv(record_items(record, menu_by_id), record.totals())
+
+
+def _lines_from_items(items, item_ids):
+    lines = []
+    for item in items:
+        if item['name'] not in item_ids:
+            raise ValueError(f"unknown menu item {item['name']!r}")
+        lines.append(BillLine(item_ids[item['name']], int(item['quantity']), _paise(item['price'])))
+    return lines
+
+
+def from_bill_json(text, item_ids, order_id=0, mode=None, payment_method=None):
+    """Parse a JSON bill (billing.render_bill_json). item_ids maps menu name -> id."""
+    doc = json.loads(text)
+    t = doc['totals']
+    return BillRecord(order_id, str(doc['order_id']), doc.get('date'), mode, payment_method,
+                      _paise(t['subtotal']), _paise(t['discount']), _paise(t['tax']),
+                      _paise(t['final_total']), _lines_from_items(doc['items'], item_ids))
+
+
+def from_bill_csv(text, item_ids, invoice, timestamp=None, order_id=0, mode=None, payment_method=None):
+    """Parse a CSV bill (billing.render_bill_csv); the CSV has no invoice/date, so pass them."""
+    items, totals = [], {}
+    rows = csv.reader(io.StringIO(text))
+    next(rows, None)    # header
+    for row in rows:
+        if len(row) == 4:
+            items.append({'name': row[0], 'quantity': int(row[1]), 'price': float(row[2])})
+        elif len(row) == 2:
+            totals[row[0]] = float(row[1])
+    return BillRecord(order_id, invoice, timestamp, mode, payment_method,
+                      _paise(totals.get("Subtotal")), _paise(totals.get("Discount")),
+                      _paise(totals.get("Tax")), _paise(totals.get("Final Total")),
+                      _lines_from_items(items, item_ids))
+
+
+def menu_item_ids(conn):
+    """{menu item name: id} for the from_bill_* converters."""
+    return {name: item_id for item_id, name in conn.execute("SELECT id, name FROM menu_items")}
+
+
+# =========================
+# CLI
+# =========================
+def export_orders(db_path, out_path, from_date=None, to_date=None):
+    """Append the selected orders to a .brec file. Returns the count written."""
+    conn = open_history(db_path, read_only=True)
+    with BillWriter(out_path) as writer:
+        for order_id in select_order_ids(conn, from_date, to_date):
+            record = record_from_order(conn, order_id)
+            if record:
+                writer.append(record)
+    conn.close()
+    return writer.count
+
+
+def _bench(path, count):
+    import random
+    import time
+
+    rng = random.Random(7)
+    t0 = time.perf_counter()
+    with BillWriter(path) as writer:
+        for i in range(1, count + 1):
+            lines = [BillLine(rng.randint(1, 50), rng.randint(1, 4), rng.randint(50, 500) * 100)
+                     for _ in range(rng.randint(1, 6))]
+            subtotal = sum(l.quantity * l.price for l in lines)
+            tax = subtotal // 20
+            writer.append(BillRecord(i, f"ORD-2025-{i:06d}", "2025-08-14 12:30:00", "Dine-In", "UPI",
+                                     subtotal, 0, tax, subtotal + tax, lines))
+    write_s = time.perf_counter() - t0
+    size = os.path.getsize(path)
+
+    t0 = time.perf_counter()
+    with BillReader(path) as reader:
+        total = sum(head[9] for head in reader.iter_headers())
+    headers_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with BillReader(path) as reader:
+        items = sum(l.quantity for record in reader for l in record.lines)
+    full_s = time.perf_counter() - t0
+
+    # the same bills as JSON documents, for comparison
+    menu = {i: (i, f"Item {i}") for i in range(1, 51)}
+    with BillReader(path) as reader:
+        sample = [to_bill_json(r, menu) for _, r in zip(range(min(count, 100000)), reader)]
+    t0 = time.perf_counter()
+    for doc in sample:
+        json.loads(doc)['totals']['final_total']
+    json_s = (time.perf_counter() - t0) * count / len(sample)
+    json_size = sum(len(doc) for doc in sample) * count / len(sample)
+
+    print(f"{count} bills: {size / 2**20:.1f} MiB brec vs ~{json_size / 2**20:.1f} MiB JSON")
+    print(f"  write {write_s:.2f}s, scan totals {headers_s:.2f}s, full decode {full_s:.2f}s, "
+          f"JSON parse ~{json_s:.2f}s (est.)")
+    print(f"  check: ₹{total / 100:,.2f} total, {items} items sold")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact binary bill records")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("export", help="append orders from the DB to a .brec file")
+    p.add_argument("out")
+    p.add_argument("--db", default=DB_PATH)
+    p.add_argument("--from-date")
+    p.add_argument("--to-date")
+    p = sub.add_parser("stats", help="count / totals of a .brec file")
+    p.add_argument("file")
+    p = sub.add_parser("dump", help="print bills as JSON (names from the DB menu)")
+    p.add_argument("file")
+    p.add_argument("--db", default=DB_PATH)
+    p.add_argument("--invoice")
+    p.add_argument("--limit", type=int, default=10)
+    p = sub.add_parser("bench", help="write and scan synthetic bills")
+    p.add_argument("--count", type=int, default=1000000)
+    p.add_argument("--out", default="bench.brec")
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        print(f"[INFO] Wrote {export_orders(args.db, args.out, args.from_date, args.to_date)} bill(s) to {args.out}")
+    elif args.cmd == "stats":
+        count = sales = tax = 0
+        with BillReader(args.file) as reader:
+            for head in reader.iter_headers():
+                count += 1
+                tax += head[8]
+                sales += head[9]
+        print(f"{count} bill(s), sales ₹{sales / 100:,.2f}, tax ₹{tax / 100:,.2f}")
+    elif args.cmd == "dump":
+        conn = sqlite3.connect(args.db)
+        menu_by_id = {row[0]: row for row in conn.execute("SELECT id, name FROM menu_items")}
+        conn.close()
+        shown = 0
+        with BillReader(args.file) as reader:
+            for record in reader:
+                if args.invoice and record.invoice != args.invoice:
+                    continue
+                print(to_bill_json(record, menu_by_id))
+                shown += 1
+                if shown >= args.limit:
+                    break
+    else:
+        try:
+            _bench(args.out, args.count)
+        finally:
+            if os.path.exists(args.out):
+                os.remove(args.out)
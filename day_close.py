@@ -0,0 +1,194 @@
+import sqlite3
+from datetime import datetime
+
+# =========================
+# END-OF-DAY CLOSE (Z-REPORT)
+# =========================
+# Each close folds only the orders after the previous close's checkpoint
+# (last_order_id) up to the newest order, so its cost is the size of the
+# shift, not the age of the DB. Orders whose timestamp is older than the
+# previous close arrived late (back-dated / synced after the close) and are
+# reported separately as adjustments instead of rewriting the old close.
+# Close rows are immutable; triggers reject UPDATE and DELETE.
+
+DB_PATH = "restaurant.db"
+
+
+def init_day_close(conn):
+    """Create the close tables/triggers if missing."""
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS day_closes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            closed_on TEXT NOT NULL,
+            shift TEXT,
+            closed_by TEXT,
+            first_order_id INTEGER,
+            last_order_id INTEGER NOT NULL,
+            orders INTEGER NOT NULL,
+            gross REAL NOT NULL,
+            discount REAL NOT NULL,
+            tax REAL NOT NULL,
+            net REAL NOT NULL,
+            adjustment_orders INTEGER NOT NULL,
+            adjustment_net REAL NOT NULL
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS day_close_lines (
+            close_id INTEGER NOT NULL,
+            dimension TEXT NOT NULL,      -- 'payment' or 'mode'
+            key TEXT,
+            adjustment INTEGER NOT NULL,  -- 1 = late order from an earlier period
+            orders INTEGER NOT NULL,
+            gross REAL NOT NULL,
+            discount REAL NOT NULL,
+            tax REAL NOT NULL,
+            net REAL NOT NULL,
+            FOREIGN KEY(close_id) REFERENCES day_closes(id)
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_day_close_lines_close ON day_close_lines(close_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_payments_order ON payments(order_id)")
+    for table in ("day_closes", "day_close_lines"):
+        for action in ("UPDATE", "DELETE"):
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_no_{action.lower()}
+                BEFORE {action} ON {table}
+                BEGIN
+                    SELECT RAISE(ABORT, 'day close records are immutable');
+                END
+            """)
+
+
+def last_close(conn):
+    """The most recent close as a dict, or None."""
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    row = cur.execute("SELECT * FROM day_closes ORDER BY id DESC LIMIT 1").fetchone()
+    return dict(row) if row else None
+
+
+def _fold(conn, dimension_sql, lo, hi, cutoff):
+    """Per-key totals for orders lo < id <= hi, split by late (adjustment) or not."""
+    join = "LEFT JOIN payments p ON p.order_id = o.id" if "p." in dimension_sql else ""
+    return conn.execute(f"""
+        SELECT {dimension_sql} AS key,
+               o.timestamp < ? AS adjustment,
+               COUNT(*), COALESCE(SUM(o.total), 0), COALESCE(SUM(o.discount), 0),
+               COALESCE(SUM(o.tax), 0), COALESCE(SUM(o.final_total), 0)
+        FROM orders o
+        {join}
+        WHERE o.id > ? AND o.id <= ?
+        GROUP BY key, adjustment
+        ORDER BY adjustment, key
+    """, (cutoff, lo, hi)).fetchall()
+
+
+def close_day(conn, shift=None, closed_by=None):
+    """Close everything since the last checkpoint. Returns the close dict, or None if nothing to close."""
+    init_day_close(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        prev = last_close(conn)
+        lo = prev['last_order_id'] if prev else 0
+        # previous close time; older timestamps after the checkpoint are late orders
+        cutoff = prev['closed_on'] if prev else ""
+        hi = conn.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()[0]
+        if hi <= lo:
+            conn.rollback()
+            return None
+
+        by_payment = _fold(conn, "COALESCE(p.payment_method, 'Unknown')", lo, hi, cutoff)
+        by_mode = _fold(conn, "COALESCE(o.mode, 'Unknown')", lo, hi, cutoff)
+
+        regular = [r for r in by_mode if not r[1]]
+        late = [r for r in by_mode if r[1]]
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        first = conn.execute("SELECT MIN(id) FROM orders WHERE id > ?", (lo,)).fetchone()[0]
+
+        cur = conn.execute("""
+            INSERT INTO day_closes (closed_on, shift, closed_by, first_order_id, last_order_id,
+                                    orders, gross, discount, tax, net, adjustment_orders, adjustment_net)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (now, shift or now[:10], closed_by, first, hi,
+              sum(r[2] for r in regular), sum(r[3] for r in regular), sum(r[4] for r in regular),
+              sum(r[5] for r in regular), sum(r[6] for r in regular),
+              sum(r[2] for r in late), sum(r[6] for r in late)))
+        close_id = cur.lastrowid
+        conn.executemany("""
+            INSERT INTO day_close_lines (close_id, dimension, key, adjustment, orders, gross, discount, tax, net)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(close_id, "payment") + tuple(r) for r in by_payment] +
+             [(close_id, "mode") + tuple(r) for r in by_mode])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return load_close(conn, close_id)
+
+
+def load_close(conn, close_id):
+    """A stored close with its breakdown lines."""
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    head = cur.execute("SELECT * FROM day_closes WHERE id = ?", (close_id,)).fetchone()
+    lines = cur.execute("""
+        SELECT dimension, key, adjustment, orders, gross, discount, tax, net
+        FROM day_close_lines WHERE close_id = ? ORDER BY dimension, adjustment, key
+    """, (close_id,)).fetchall()
+    if not head:
+        return None
+    close = dict(head)
+    close['lines'] = [dict(r) for r in lines]
+    return close
+
+
+def format_z_report(close):
+    """Plain-text Z-report for the preview window / printer."""
+    out = []
+    out.append("      KIRUBA RESTAURANT")
+    out.append(f"   Z-REPORT #{close['id']}  ({close['shift']})")
+    out.append("-" * 40)
+    out.append(f"Closed on : {close['closed_on']}")
+    if close.get('closed_by'):
+        out.append(f"Closed by : {close['closed_by']}")
+    out.append(f"Orders    : #{close['first_order_id']} .. #{close['last_order_id']}")
+    out.append("-" * 40)
+    out.append(f"{'Orders':<18}{close['orders']:>10}")
+    out.append(f"{'Gross':<18}₹{close['gross']:>10.2f}")
+    out.append(f"{'Discount':<18}₹{close['discount']:>10.2f}")
+    out.append(f"{'Tax':<18}₹{close['tax']:>10.2f}")
+    out.append(f"{'Net':<18}₹{close['net']:>10.2f}")
+    for dimension, title in (("payment", "By payment method"), ("mode", "By order mode")):
+        out.append("-" * 40)
+        out.append(title)
+        for line in close['lines']:
+            if line['dimension'] == dimension and not line['adjustment']:
+                out.append(f"  {line['key']:<14}{line['orders']:>4}  ₹{line['net']:>10.2f}")
+    if close['adjustment_orders']:
+        out.append("-" * 40)
+        out.append("Adjustments (late orders from earlier periods)")
+        for line in close['lines']:
+            if line['dimension'] == "payment" and line['adjustment']:
+                out.append(f"  {line['key']:<14}{line['orders']:>4}  ₹{line['net']:>10.2f}")
+        out.append(f"  {'Total':<14}{close['adjustment_orders']:>4}  ₹{close['adjustment_net']:>10.2f}")
+    out.append("-" * 40)
+    return "\n".join(out) + "\n"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Close the day / shift and print the Z-report")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--shift", help="label for this close (default: today's date)")
+    parser.add_argument("--by", help="who is closing")
+    parser.add_argument("--show", type=int, help="print an existing close instead")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=10)
+    init_day_close(conn)
+    close = load_close(conn, args.show) if args.show else close_day(conn, args.shift, args.by)
+    conn.close()
+    print(format_z_report(close) if close else "[INFO] Nothing to close since the last checkpoint.")
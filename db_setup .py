@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from assets import build_thumbnails
 
 # Base project directory (folder containing this script)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -95,11 +96,19 @@ cursor.execute('''
         order_id INTEGER,
         item_id INTEGER,
         quantity INTEGER,
+        price REAL,
         FOREIGN KEY(order_id) REFERENCES orders(id),
         FOREIGN KEY(item_id) REFERENCES menu_items(id)
     )
 ''')
 
+# --- Try adding `price` (unit price at the time of sale) if missing ---
+try:
+    cursor.execute("ALTER TABLE order_items ADD COLUMN price REAL")
+    print("[INFO] Added missing column: order_items.price")
+except sqlite3.OperationalError:
+    print("[INFO] Column order_items.price already exists.")
+
 cursor.execute('''
     CREATE TABLE IF NOT EXISTS payments (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -113,9 +122,12 @@ cursor.execute('''
 
 
 # --- Menu Items with Image Paths ---
+# One directory listing instead of an exists() check per menu row
+available_images = set(os.listdir(image_dir))
+
 def resolve_image(filename):
     path = os.path.join(image_dir, filename)
-    if os.path.exists(path):
+    if filename in available_images:
         return filename
     else:
         print(f"[WARNING] Image file not found: {path}")
@@ -175,20 +187,24 @@ menu_data = [
     (50, 'Fruit Salad', 'Salad', 80, resolve_image('fruit_salad.png'), 3),
 ]
 
-# Insert or update menu data
-for item in menu_data:
-    cursor.execute("""
-        INSERT INTO menu_items (id, name, category, price, image_path, tax_percent)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            name=excluded.name,
-            category=excluded.category,
-            price=excluded.price,
-            image_path=excluded.image_path,
-            tax_percent=excluded.tax_percent
-    """, item)
+# Insert or update menu data (single executemany; use menu_sync.py for CSV menus)
+cursor.executemany("""
+    INSERT INTO menu_items (id, name, category, price, image_path, tax_percent)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name=excluded.name,
+        category=excluded.category,
+        price=excluded.price,
+        image_path=excluded.image_path,
+        tax_percent=excluded.tax_percent
+""", menu_data)
 
 conn.commit()
+
+# --- Asset build: pre-sized menu thumbnails (only new/changed images) ---
+built, skipped, removed = build_thumbnails(conn, image_dir)
+print(f"[INFO] Thumbnails: {built} built, {skipped} up to date, {removed} removed.")
+
 conn.close()
 
 print("✅ Database and menu items set up successfully.")
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+# =========================
+# KITCHEN ORDER TICKETS (KOT)
+# =========================
+# A tiny pub/sub hub on localhost. The billing app pushes each submitted
+# order as a ticket; kitchen displays subscribe and get it immediately, then
+# send back `ack` (seen) and `bump` (done). Everyone connected gets the status
+# changes. Messages are JSON, one per line:
+#
+#   -> {"type": "hello", "role": "kitchen" | "pos"}
+#   -> {"type": "ticket", "ticket": {...}}          (pos)
+#   -> {"type": "ack" | "bump", "order_id": 12}     (kitchen)
+#   <- {"type": "ticket", "ticket": {...}}
+#   <- {"type": "status", "order_id": 12, "status": "acked" | "done"}
+#
+# Open tickets are replayed to a kitchen display when it (re)connects.
+# Malformed messages are skipped with a warning; a peer that stops reading
+# is dropped once SLOW_PEER_BUFFER bytes are queued for it.
+#
+#   python kot.py serve            # hub (start once per outlet)
+#   python kot.py kitchen          # console kitchen display
+#   python kot.py bench            # publish->display latency check
+
+KOT_HOST = "127.0.0.1"
+KOT_PORT = 8765
+SLOW_PEER_BUFFER = 256 * 1024
+
+
+def _encode(msg):
+    return (json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _valid_ticket(ticket):
+    """A ticket a kitchen display can show: an int order_id and lines of {name, qty}."""
+    return (isinstance(ticket, dict) and isinstance(ticket.get("order_id"), int)
+            and isinstance(ticket.get("lines"), list)
+            and all(isinstance(line, dict) and "name" in line and "qty" in line for line in ticket["lines"]))
+
+
+# =========================
+# HUB
+# =========================
+class KotHub:
+    def __init__(self):
+        self.open_tickets = {}    # order_id -> ticket (insertion = arrival order)
+        self.clients = set()      # StreamWriters of every connected peer
+
+    def broadcast(self, msg):
+        """Queue `msg` for every peer without waiting on any of them."""
+        data = _encode(msg)
+        for writer in list(self.clients):
+            try:
+                writer.write(data)
+            except (ConnectionError, RuntimeError):
+                self.clients.discard(writer)
+                continue
+            if writer.transport.get_write_buffer_size() > SLOW_PEER_BUFFER:
+                print("[WARNING] KOT hub: dropped a peer that stopped reading")
+                self.clients.discard(writer)
+                writer.close()
+
+    async def handle(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # longer than the stream limit; the reader skips past it
+                    print("[WARNING] KOT hub: skipped an oversized message")
+                    continue
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    msg = None
+                if not isinstance(msg, dict):
+                    print(f"[WARNING] KOT hub: skipped malformed message {line[:80]!r}")
+                    continue
+                kind = msg.get("type")
+                if kind == "hello" and msg.get("role") == "kitchen":
+                    for ticket in self.open_tickets.values():
+                        writer.write(_encode({"type": "ticket", "ticket": ticket}))
+                elif kind == "ticket":
+                    ticket = msg.get("ticket")
+                    if not _valid_ticket(ticket):
+                        print(f"[WARNING] KOT hub: skipped invalid ticket {line[:80]!r}")
+                        continue
+                    ticket.setdefault("status", "new")
+                    self.open_tickets[ticket["order_id"]] = ticket
+                    self.broadcast({"type": "ticket", "ticket": ticket})
+                elif kind in ("ack", "bump"):
+                    order_id = msg.get("order_id")
+                    ticket = self.open_tickets.get(order_id) if isinstance(order_id, int) else None
+                    if ticket is None:
+                        continue
+                    if kind == "ack":
+                        ticket["status"] = "acked"
+                    else:
+                        ticket["status"] = "done"
+                        del self.open_tickets[order_id]
+                    self.broadcast({"type": "status", "order_id": order_id, "status": ticket["status"]})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+
+async def serve(host=KOT_HOST, port=KOT_PORT, unix_path=None, ready=None):
+    hub = KotHub()
+    if unix_path:
+        server = await asyncio.start_unix_server(hub.handle, unix_path)
+    else:
+        server = await asyncio.start_server(hub.handle, host, port)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+# =========================
+# PUBLISHER (billing side)
+# =========================
+def make_ticket(order_id, invoice_number, mode, table, lines):
+    """lines: [(item_id, name, qty), ...]"""
+    return {
+        "order_id": order_id,
+        "invoice": invoice_number,
+        "mode": mode,
+        "table": table,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sent_at": time.time(),
+        "lines": [{"item_id": i, "name": n, "qty": q} for i, n, q in lines],
+    }
+
+
+def send_ticket(ticket, host=KOT_HOST, port=KOT_PORT, unix_path=None, timeout=0.5):
+    """Push one ticket to the hub (blocking, short timeout). Returns True on success."""
+    try:
+        if unix_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(unix_path)
+        else:
+            sock = socket.create_connection((host, port), timeout=timeout)
+        with sock:
+            if not unix_path:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(_encode({"type": "hello", "role": "pos"}) + _encode({"type": "ticket", "ticket": ticket}))
+        return True
+    except OSError:
+        return False
+
+
+def publish_ticket(ticket, **kwargs):
+    """Fire-and-forget send from the UI thread; a missing hub never blocks billing."""
+    def run():
+        if not send_ticket(ticket, **kwargs):
+            print(f"[WARNING] KOT hub not reachable; ticket {ticket['order_id']} not sent")
+    threading.Thread(target=run, daemon=True).start()
+
+
+# =========================
+# KITCHEN DISPLAY (console)
+# =========================
+def format_ticket(ticket):
+    where = f"Table {ticket['table']}" if ticket.get("table") else ticket.get("mode") or ""
+    out = [f"#{ticket['order_id']}  {ticket.get('invoice') or ''}  {where}  {ticket.get('created', '')[11:16]}"]
+    for line in ticket["lines"]:
+        out.append(f"    {line['qty']:>2} x {line['name']}")
+    return "\n".join(out)
+
+
+async def kitchen_display(host=KOT_HOST, port=KOT_PORT, unix_path=None):
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(_encode({"type": "hello", "role": "kitchen"}))
+    await writer.drain()
+    print("Kitchen display connected. Commands: a <order_id> = ack, b <order_id> = bump/done")
+
+    async def read_commands():
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            parts = line.split()
+            if len(parts) == 2 and parts[0] in ("a", "b") and parts[1].isdigit():
+                kind = "ack" if parts[0] == "a" else "bump"
+                writer.write(_encode({"type": kind, "order_id": int(parts[1])}))
+                await writer.drain()
+
+    commands = asyncio.ensure_future(read_commands())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                print("[WARNING] KOT hub closed the connection")
+                break
+            msg = json.loads(line)
+            if msg["type"] == "ticket":
+                print("\n" + format_ticket(msg["ticket"]), flush=True)
+            elif msg["type"] == "status":
+                print(f"  -> #{msg['order_id']} {msg['status']}", flush=True)
+    finally:
+        commands.cancel()
+        writer.close()
+
+
+# =========================
+# LATENCY CHECK
+# =========================
+async def _bench(count, host, port):
+    ready = asyncio.Event()
+    server = asyncio.ensure_future(serve(host, port, ready=ready))
+    await ready.wait()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(_encode({"type": "hello", "role": "kitchen"}))
+    await writer.drain()
+
+    loop = asyncio.get_running_loop()
+    latencies = []
+    for i in range(1, count + 1):
+        ticket = make_ticket(i, f"BENCH-{i:04d}", "Dine-In", 1 + i % 20, [(1, "Burger", 2)])
+        # publish exactly as the billing app does (blocking socket, own thread)
+        await loop.run_in_executor(None, send_ticket, ticket, host, port)
+        while True:
+            msg = json.loads(await reader.readline())
+            if msg["type"] == "ticket" and msg["ticket"]["order_id"] == i:
+                latencies.append((time.time() - msg["ticket"]["sent_at"]) * 1000)
+                break
+        writer.write(_encode({"type": "bump", "order_id": i}))
+    writer.close()
+    await writer.wait_closed()
+    # let the hub's handlers see EOF before the server goes away
+    await asyncio.sleep(0.05)
+    server.cancel()
+    latencies.sort()
+    print(f"{count} tickets: p50 {latencies[len(latencies) // 2]:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms, max {latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kitchen order ticket hub / display")
+    parser.add_argument("cmd", choices=["serve", "kitchen", "bench"])
+    parser.add_argument("--host", default=KOT_HOST)
+    parser.add_argument("--port", type=int, default=KOT_PORT)
+    parser.add_argument("--unix", help="use a Unix socket path instead of TCP")
+    parser.add_argument("--count", type=int, default=200, help="tickets for bench")
+    args = parser.parse_args()
+
+    try:
+        if args.cmd == "serve":
+            print(f"[INFO] KOT hub listening on {args.unix or f'{args.host}:{args.port}'}")
+            asyncio.run(serve(args.host, args.port, args.unix))
+        elif args.cmd == "kitchen":
+            asyncio.run(kitchen_display(args.host, args.port, args.unix))
+        else:
+            # private hub on the next port so a running outlet hub is untouched
+            asyncio.run(_bench(args.count, args.host, args.port + 1))
+    except KeyboardInterrupt:
+        pass
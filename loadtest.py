@@ -0,0 +1,206 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from multiprocessing import Event, Pool, Process
+
+from archive import store_bill
+from billing import render_pdf_bill
+from orders import DB_PATH, sales_summary, save_order
+from retention import ensure_line_price, open_history
+from rules import Cart, init_rules, load_price_book
+from search import init_search, sync_search_index
+
+# =========================
+# CASHIER LOAD TEST
+# =========================
+# Simulates N cashier counters hammering one restaurant.db through
+# orders.save_order plus the archive.store_bill write that follows it (the
+# same two transactions submit_order runs) while a dashboard process keeps
+# running the sales_summary queries. Cashiers use the app's connection
+# settings (5 s busy timeout, no retries) unless told otherwise. For each
+# concurrency level it reports throughput, latency percentiles, lock
+# retries and errors.
+
+APP_TIMEOUT = 5.0   # sqlite3.connect() default, as used by submit_order
+
+
+def _is_locked(exc):
+    return "locked" in str(exc) or "busy" in str(exc)
+
+
+def load_menu(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    menu = conn.execute("SELECT id, name, price, image_path, tax_percent FROM menu_items").fetchall()
+    conn.close()
+    return menu
+
+
+def archive_root_for(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "bills")
+
+
+def cashier_session(db_path, menu, duration, seed, timeout=APP_TIMEOUT, max_retries=0, archive_root=None):
+    """Submit random orders for `duration` seconds. Returns a stats dict."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    menu_by_id = {row[0]: row for row in menu}
+    # price through the stored rules, as submit_order does via live_cart
+    book = load_price_book(conn, menu_by_id)
+    archive_root = archive_root or archive_root_for(db_path)
+    latencies, retries, errors = [], 0, 0
+
+    # one representative PDF per session: the app renders before taking
+    # any lock, so only the archive write is part of the contention
+    sample = [{'name': row[1], 'price': float(row[2]), 'quantity': 1} for row in menu[:3]]
+    priced = Cart(book)
+    priced.update([(row[0], 1) for row in menu[:3]])
+    totals = priced.totals()
+    totals['promotions'] = priced.promotions()
+    bill = render_pdf_bill("ORD-LOAD-0001", sample, totals)
+
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        cart = [(row[0], rng.randint(1, 3)) for row in rng.sample(menu, rng.randint(1, min(6, len(menu))))]
+        priced = Cart(book)
+        priced.update(cart)
+        totals = priced.totals(rng.choice([0.0, 0.0, 10.0]))
+        mode = rng.choice(["Dine-In", "Takeaway"])
+        method = rng.choice(["Cash", "Card", "UPI"])
+
+        started = time.perf_counter()
+        invoice_number = None
+        for attempt in range(max_retries + 1):
+            try:
+                _, invoice_number, _ = save_order(conn, mode, method, cart, totals, menu_by_id)
+                break
+            except sqlite3.OperationalError as exc:
+                if not _is_locked(exc) or attempt == max_retries:
+                    break
+                retries += 1
+                time.sleep(min(0.001 * (2 ** attempt), 0.05) * rng.random())
+        if invoice_number is None:
+            errors += 1
+            continue
+        # submit_order then archives the bill: a second write lock and an fsync
+        try:
+            store_bill(invoice_number, "pdf", bill, db_path=db_path, root=archive_root)
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    return {'latencies': latencies, 'retries': retries, 'errors': errors}
+
+
+def _session_args(args):
+    return cashier_session(*args)
+
+
+def dashboard_loop(db_path, stop, interval=0.2):
+    """Run the dashboard report queries until `stop` is set."""
+    conn = open_history(db_path, timeout=5)
+    while not stop.is_set():
+        now = datetime.now()
+        for start in (now.replace(hour=0, minute=0, second=0, microsecond=0),
+                      now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)):
+            try:
+                sales_summary(conn, start)
+            except sqlite3.OperationalError:
+                pass
+        stop.wait(interval)
+    conn.close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def run_level(db_path, cashiers, duration, use_processes, with_dashboard=True, timeout=APP_TIMEOUT, max_retries=0):
+    """Run one concurrency level and return the merged stats."""
+    stop = Event()
+    dash = None
+    if with_dashboard:
+        dash = Process(target=dashboard_loop, args=(db_path, stop), daemon=True)
+        dash.start()
+
+    menu = load_menu(db_path)
+    jobs = [(db_path, menu, duration, 1000 * cashiers + i, timeout, max_retries) for i in range(cashiers)]
+    started = time.perf_counter()
+    try:
+        if use_processes:
+            with Pool(cashiers) as pool:
+                results = pool.map(_session_args, jobs)
+        else:
+            with ThreadPoolExecutor(cashiers) as pool:
+                results = list(pool.map(_session_args, jobs))
+    finally:
+        stop.set()
+        if dash is not None:
+            dash.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for r in results for lat in r['latencies']]
+    return {
+        'cashiers': cashiers,
+        'orders': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50': _percentile(latencies, 50) * 1000,
+        'p95': _percentile(latencies, 95) * 1000,
+        'p99': _percentile(latencies, 99) * 1000,
+        'retries': sum(r['retries'] for r in results),
+        'errors': sum(r['errors'] for r in results),
+    }
+
+
+def prepare_db(source, journal_mode=None):
+    """Copy the DB to a temp file so the test never touches real sales."""
+    folder = tempfile.mkdtemp(prefix="kiruba_load_")
+    path = os.path.join(folder, "restaurant.db")
+    shutil.copyfile(source, path)
+    conn = sqlite3.connect(path)
+    if journal_mode:
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    # save_order stores line prices and indexes every order for search, as
+    # the app does after init_db
+    ensure_line_price(conn)
+    init_rules(conn)
+    init_search(conn)
+    sync_search_index(conn)
+    conn.close()
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Concurrent cashier load test for restaurant.db")
+    parser.add_argument("--db", default=DB_PATH, help="source DB (copied, never modified)")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="cashier counts to try")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    parser.add_argument("--processes", action="store_true", help="cashiers as processes instead of threads")
+    parser.add_argument("--no-dashboard", action="store_true")
+    parser.add_argument("--timeout", type=float, default=APP_TIMEOUT, help="sqlite busy timeout per attempt (s)")
+    parser.add_argument("--retries", type=int, default=0, help="retries after a lock timeout (the app makes none)")
+    parser.add_argument("--journal", choices=["delete", "wal"], default=None,
+                        help="journal mode for the test copy (default: as in source)")
+    parser.add_argument("--in-place", action="store_true", help="write to --db directly (DANGEROUS)")
+    args = parser.parse_args()
+
+    db_path = args.db if args.in_place else prepare_db(args.db, args.journal)
+    print(f"[INFO] Load testing {db_path} with {'processes' if args.processes else 'threads'}")
+    print(f"{'cashiers':>8} {'orders':>7} {'ord/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'retries':>8} {'errors':>7}")
+    for level in [int(x) for x in args.levels.split(",") if x.strip()]:
+        r = run_level(db_path, level, args.duration, args.processes, not args.no_dashboard, args.timeout, args.retries)
+        print(f"{r['cashiers']:>8} {r['orders']:>7} {r['throughput']:>8.1f} {r['p50']:>8.2f} "
+              f"{r['p95']:>8.2f} {r['p99']:>8.2f} {r['retries']:>8} {r['errors']:>7}", flush=True)
+    if not args.in_place:
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
@@ -0,0 +1,215 @@
+import csv
+import hashlib
+import sqlite3
+
+from retention import history_schemas, open_history
+
+# =========================
+# MENU IMPORT / EXPORT
+# =========================
+# Syncs menu_items with a CSV (id,name,category,price,tax_percent[,image_path]).
+# The CSV is streamed row by row and compared against a per-id content hash of
+# the current table, so only real inserts/updates/deletes are written, all in
+# one executemany transaction. Items that past orders (hot or archived) still
+# reference are never deleted; they are reported as kept instead. Dry runs
+# and exports read the DB as it is (a column an older table lacks reads as
+# empty); only a real import adds columns and the order_items(item_id) index.
+
+DB_PATH = "restaurant.db"
+COLUMNS = ["id", "name", "category", "price", "tax_percent", "image_path"]
+REQUIRED = ["id", "name", "price"]
+
+
+def _normalise(col, value):
+    """Canonical text for a column value, so '120' and '120.0' hash the same."""
+    if value is None or value == "":
+        return ""
+    if col == "id":
+        return str(int(value))
+    if col in ("price", "tax_percent"):
+        return f"{float(value):.4f}"
+    return str(value).strip()
+
+
+def row_hash(row, columns):
+    return hashlib.sha1("\x1f".join(_normalise(c, row[c]) for c in columns).encode("utf-8")).hexdigest()
+
+
+def _have_columns(conn):
+    return {r[1] for r in conn.execute("PRAGMA table_info(menu_items)")}
+
+
+def _ensure_columns(conn):
+    """app.init_db creates menu_items without `category`; add it if missing."""
+    if "category" not in _have_columns(conn):
+        conn.execute("ALTER TABLE menu_items ADD COLUMN category TEXT")
+
+
+def _select_list(conn, columns):
+    """`columns` of menu_items, NULL for any the table lacks."""
+    have = _have_columns(conn)
+    return ", ".join(c if c in have else f"NULL AS {c}" for c in columns)
+
+
+def _coerce(row, columns):
+    values = {c: (row.get(c) or "").strip() for c in columns}
+    values["id"] = int(values["id"])
+    values["price"] = float(values["price"])
+    if "tax_percent" in values:
+        values["tax_percent"] = float(values["tax_percent"] or 0)
+    for c in ("name", "category", "image_path"):
+        if c in values:
+            values[c] = values[c] or None
+    return values
+
+
+def diff_menu(conn, csv_path, delete_missing=True):
+    """Compare a menu CSV against menu_items.
+
+    Returns (columns, inserts, updates, deletes): lists of value dicts for
+    inserts/updates and ids for deletes. Raises ValueError on a bad row.
+    """
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        reader.fieldnames = header
+        missing = [c for c in REQUIRED if c not in header]
+        if missing:
+            raise ValueError(f"{csv_path}: missing column(s) {', '.join(missing)}")
+        # only compare/overwrite the columns the CSV actually has
+        columns = [c for c in COLUMNS if c in header]
+
+        current = {}
+        for db_row in conn.execute(f"SELECT {_select_list(conn, columns)} FROM menu_items"):
+            values = dict(zip(columns, db_row))
+            current[values["id"]] = row_hash(values, columns)
+
+        inserts, updates, seen = [], [], set()
+        for line_no, raw in enumerate(reader, start=2):
+            if not any((v or "").strip() for v in raw.values()):
+                continue
+            try:
+                values = _coerce(raw, columns)
+            except (TypeError, ValueError):
+                raise ValueError(f"{csv_path}:{line_no}: invalid row {raw}")
+            item_id = values["id"]
+            if item_id in seen:
+                raise ValueError(f"{csv_path}:{line_no}: duplicate id {item_id}")
+            seen.add(item_id)
+
+            old = current.get(item_id)
+            if old is None:
+                inserts.append(values)
+            elif old != row_hash(values, columns):
+                updates.append(values)
+
+    deletes = sorted(set(current) - seen) if delete_missing else []
+    return columns, inserts, updates, deletes
+
+
+def _item_indexed(conn, schema):
+    """Whether `schema`.order_items has an index led by item_id."""
+    for index in conn.execute(f"PRAGMA {schema}.index_list(order_items)"):
+        first = conn.execute(f"PRAGMA {schema}.index_info({index[1]})").fetchone()
+        if first and first[2] == "item_id":
+            return True
+    return False
+
+
+def referenced_ids(conn, item_ids):
+    """The subset of item_ids that appear on any order line, hot or archived."""
+    wanted = set(item_ids)
+    found = set()
+    for schema in history_schemas(conn):
+        left = sorted(wanted - found)
+        if not left:
+            break
+        if _item_indexed(conn, schema):
+            found.update(i for i in left if conn.execute(
+                f"SELECT 1 FROM {schema}.order_items WHERE item_id = ? LIMIT 1", (i,)).fetchone())
+        else:
+            # a dry run never adds the index: one pass over the lines instead
+            found.update(r[0] for r in conn.execute(f"SELECT DISTINCT item_id FROM {schema}.order_items")
+                         if r[0] in wanted)
+    return found
+
+
+def import_menu(csv_path, db_path=DB_PATH, delete_missing=True, dry_run=False):
+    """Apply a menu CSV. Returns {'inserted', 'updated', 'deleted', 'kept'} id lists.
+
+    'kept' lists items missing from the CSV that were not deleted because
+    past orders still reference them (reprints and reports need their names).
+    """
+    conn = open_history(db_path, read_only=dry_run)
+    try:
+        columns, inserts, updates, deletes = diff_menu(conn, csv_path, delete_missing)
+        if not dry_run:
+            _ensure_columns(conn)
+            # same index as search.init_search; the archive gets it on attach
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_order_items_item ON order_items(item_id, order_id)")
+        in_use = referenced_ids(conn, deletes)
+        kept = [i for i in deletes if i in in_use]
+        deletes = [i for i in deletes if i not in in_use]
+        if not dry_run:
+            cols = ", ".join(columns)
+            marks = ", ".join("?" for _ in columns)
+            sets = ", ".join(f"{c} = ?" for c in columns if c != "id")
+            with conn:
+                conn.executemany(f"INSERT INTO menu_items ({cols}) VALUES ({marks})",
+                                 [tuple(v[c] for c in columns) for v in inserts])
+                conn.executemany(f"UPDATE menu_items SET {sets} WHERE id = ?",
+                                 [tuple(v[c] for c in columns if c != "id") + (v["id"],) for v in updates])
+                conn.executemany("DELETE FROM menu_items WHERE id = ?", [(i,) for i in deletes])
+    finally:
+        conn.close()
+    return {
+        'inserted': [v["id"] for v in inserts],
+        'updated': [v["id"] for v in updates],
+        'deleted': deletes,
+        'kept': kept,
+    }
+
+
+def export_menu(csv_path, db_path=DB_PATH):
+    """Write menu_items to CSV (streamed). Returns the row count."""
+    conn = sqlite3.connect(db_path)
+    count = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in conn.execute(f"SELECT {_select_list(conn, COLUMNS)} FROM menu_items ORDER BY id"):
+            writer.writerow(["" if v is None else v for v in row])
+            count += 1
+    conn.close()
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync menu_items with a CSV file")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("import", help="apply a CSV to menu_items")
+    p.add_argument("csv")
+    p.add_argument("--db", default=DB_PATH)
+    p.add_argument("--dry-run", action="store_true", help="only report the diff")
+    p.add_argument("--keep-missing", action="store_true", help="do not delete items absent from the CSV")
+    p = sub.add_parser("export", help="write menu_items to a CSV")
+    p.add_argument("csv")
+    p.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    if args.cmd == "import":
+        diff = import_menu(args.csv, args.db, not args.keep_missing, args.dry_run)
+        prefix = "[DRY RUN] " if args.dry_run else ""
+        for key in ("inserted", "updated", "deleted"):
+            ids = diff[key]
+            shown = ", ".join(map(str, ids[:20])) + (" ..." if len(ids) > 20 else "")
+            print(f"[INFO] {prefix}{key}: {len(ids)}" + (f" ({shown})" if ids else ""))
+        if diff["kept"]:
+            ids = diff["kept"]
+            shown = ", ".join(map(str, ids[:20])) + (" ..." if len(ids) > 20 else "")
+            print(f"[WARNING] {prefix}kept {len(ids)} item(s) missing from the CSV that past orders "
+                  f"still use ({shown})")
+    else:
+        print(f"[INFO] Exported {export_menu(args.csv, args.db)} item(s) to {args.csv}")
@@ -0,0 +1,195 @@
+from datetime import datetime
+
+from retention import history_schemas
+from search import index_order, mark_out_of_order
+
+# =========================
+# ORDER QUERIES
+# =========================
+# Plain sqlite helpers shared by the app and the batch tools; nothing here
+# imports Tk. Read helpers query the all_* views, so pass a connection from
+# retention.open_history() to see archived orders too.
+
+DB_PATH = "restaurant.db"
+
+
+def fetch_order(conn, order_id):
+    """Return one order as a dict (header, totals, payment), or None."""
+    row = conn.execute("""
+        SELECT o.id, o.invoice_number, o.timestamp, o.mode,
+               o.total, o.discount, o.tax, o.final_total,
+               (SELECT p.payment_method FROM all_payments p WHERE p.order_id = o.id LIMIT 1)
+        FROM all_orders o
+        WHERE o.id = ?
+    """, (order_id,)).fetchone()
+    if not row:
+        return None
+    return {
+        'id': row[0],
+        'invoice_number': row[1] or str(row[0]),
+        'timestamp': row[2],
+        'mode': row[3],
+        'payment_method': row[8],
+        'totals': {
+            'subtotal': float(row[4] or 0),
+            'discount': float(row[5] or 0),
+            'tax': float(row[6] or 0),
+            'final_total': float(row[7] or 0),
+        },
+    }
+
+
+def load_order_items(conn, order_id):
+    """Rebuild the bill item list for an order from order_items/menu_items.
+
+    Uses the unit price stored with the line; today's menu price is only a
+    fallback for lines saved before prices were recorded.
+    """
+    rows = conn.execute("""
+        SELECT COALESCE(mi.name, 'Item #' || oi.item_id), COALESCE(oi.price, mi.price, 0), oi.quantity
+        FROM all_order_items oi
+        LEFT JOIN menu_items mi ON mi.id = oi.item_id
+        WHERE oi.order_id = ?
+        ORDER BY oi.id
+    """, (order_id,)).fetchall()
+    return [{'name': name, 'price': float(price), 'quantity': qty} for name, price, qty in rows]
+
+
+def invoice_order_id(invoice_number):
+    """Order id from an invoice number (ORD-2024-0042 -> 42, '42' -> 42)."""
+    tail = str(invoice_number).strip().rsplit("-", 1)[-1]
+    if not tail.isdigit():
+        raise ValueError(f"Invalid invoice number '{invoice_number}'")
+    return int(tail)
+
+
+def select_order_ids(conn, from_date=None, to_date=None, from_invoice=None, to_invoice=None):
+    """Order ids matching a date range (YYYY-MM-DD, inclusive) and/or invoice range.
+
+    Invoice bounds compare on the numeric order id, so ORD-2024-9999 sorts
+    before ORD-2024-10000.
+    """
+    where, params = [], []
+    if from_date:
+        where.append("timestamp >= ?")
+        params.append(from_date)
+    if to_date:
+        # inclusive of the whole last day
+        where.append("timestamp < date(?, '+1 day')")
+        params.append(to_date)
+    if from_invoice:
+        where.append("id >= ?")
+        params.append(invoice_order_id(from_invoice))
+    if to_invoice:
+        where.append("id <= ?")
+        params.append(invoice_order_id(to_invoice))
+    sql = "SELECT id FROM all_orders"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id"
+    return [r[0] for r in conn.execute(sql, params)]
+
+
+# =========================
+# ORDER WRITES
+# =========================
+def cart_totals(cart, menu_by_id, discount=0.0):
+    """Subtotal / per-item tax / discount for a cart of (item_id, qty)."""
+    subtotal = 0.0
+    total_tax = 0.0
+    for item_id, qty in cart:
+        item = menu_by_id.get(item_id)
+        if item and qty > 0:
+            line_total = qty * float(item[2])
+            subtotal += line_total
+            total_tax += line_total * float(item[4] or 0) / 100.0
+    return {
+        'subtotal': subtotal,
+        'discount': discount,
+        'tax': total_tax,
+        'final_total': subtotal - discount + total_tax,
+    }
+
+
+def save_order(conn, mode, payment_method, cart, totals, menu_by_id):
+    """Insert order, lines and payment in one transaction.
+
+    Returns (order_id, invoice_number, ordered_items) where ordered_items is
+    the bill item list ({'name', 'price', 'quantity'}).
+    """
+    c = conn.cursor()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        c.execute("""
+            INSERT INTO orders (timestamp, mode, total, discount, tax, final_total)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (timestamp, mode, totals['subtotal'], totals['discount'], totals['tax'], totals['final_total']))
+        order_id = c.lastrowid
+
+        # Invoice number
+        invoice_number = f"ORD-{datetime.now().year}-{order_id:04d}"
+        c.execute("UPDATE orders SET invoice_number = ? WHERE id = ?", (invoice_number, order_id))
+
+        # Items
+        # the unit price is stored so reprints don't follow later menu edits
+        lines = []
+        ordered_items = []
+        for item_id, qty in cart:
+            if qty <= 0:
+                continue
+            item = menu_by_id.get(item_id)
+            price = float(item[2]) if item else None
+            lines.append((order_id, item_id, qty, price))
+            if item:
+                ordered_items.append({'name': item[1], 'price': price, 'quantity': qty})
+        c.executemany("INSERT INTO order_items (order_id, item_id, quantity, price) VALUES (?, ?, ?, ?)", lines)
+
+        # Payment
+        c.execute("INSERT INTO payments (order_id, payment_method, amount_paid) VALUES (?, ?, ?)",
+                  (order_id, payment_method, totals['final_total']))
+        index_order(conn, order_id)
+        mark_out_of_order(conn, order_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return order_id, invoice_number, ordered_items
+
+
+# =========================
+# REPORT QUERIES
+# =========================
+def sales_summary(conn, start):
+    """Order count, sales, tax and top 5 items since `start` (a datetime)."""
+    since = start.strftime("%Y-%m-%d %H:%M:%S")
+    num_orders, total_sales, total_tax = 0, 0.0, 0.0
+    qty_by_item = {}
+    # aggregate each side on its own indexes; UNION ALL views can't be
+    # flattened under GROUP BY
+    for schema in history_schemas(conn):
+        row = conn.execute(f"""
+            SELECT COUNT(*), SUM(final_total), SUM(tax)
+            FROM {schema}.orders
+            WHERE timestamp >= ?
+        """, (since,)).fetchone() or (0, 0.0, 0.0)
+        num_orders += row[0] or 0
+        total_sales += row[1] or 0.0
+        total_tax += row[2] or 0.0
+
+        for name, qty in conn.execute(f"""
+            SELECT mi.name, SUM(oi.quantity) as total_qty
+            FROM {schema}.orders o
+            CROSS JOIN {schema}.order_items oi ON oi.order_id = o.id
+            JOIN menu_items mi ON mi.id = oi.item_id
+            WHERE o.timestamp >= ?
+            GROUP BY oi.item_id
+        """, (since,)):
+            qty_by_item[name] = qty_by_item.get(name, 0) + qty
+
+    top_items = sorted(qty_by_item.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    return {
+        'orders': num_orders,
+        'sales': total_sales,
+        'tax': total_tax,
+        'top_items': top_items,
+    }
@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+
+# =========================
+# REPORTING REPLICA
+# =========================
+# The sales dashboard and exports read from restaurant_replica.db instead of
+# the live DB the cashiers write to. The replica is refreshed in the
+# background: incrementally (new orders above the replica's high-water id)
+# when possible, or as a full snapshot through the online backup API when
+# the replica is missing or retention has removed rows from the hot DB.
+#
+# The replica is read with the live restaurant_archive.db attached. Right
+# after a retention run the archive already holds orders the replica has not
+# dropped yet; stale_against_archive() spots that so reports can use the live
+# DB until the next refresh takes a fresh snapshot.
+#
+# Report log rows are buffered in memory and written to `reports` in one
+# short transaction per refresh, so clicking Day/Week/Month never takes the
+# billing DB's write lock.
+
+DB_PATH = "restaurant.db"
+REPLICA_NAME = "restaurant_replica.db"
+REFRESH_MS = 60 * 1000
+
+# tables that only grow by id (copied incrementally), with their order key;
+# columns are taken from the live DB so added columns come along
+APPEND_TABLES = [
+    ("orders", "id"),
+    ("order_items", "order_id"),
+    ("payments", "order_id"),
+]
+# small tables edited in place, copied whole on every incremental refresh
+COPY_TABLES = ["menu_items"]
+
+_report_buffer = []
+_buffer_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def replica_path_for(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), REPLICA_NAME)
+
+
+def snapshot_replica(db_path=DB_PATH, replica_path=None, pages=1024):
+    """Full copy of the live DB through the backup API (copied in page steps)."""
+    replica_path = replica_path or replica_path_for(db_path)
+    src = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=10)
+    dst = sqlite3.connect(replica_path)
+    try:
+        src.backup(dst, pages=pages)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _schema_changed(conn):
+    tables = [table for table, _ in APPEND_TABLES] + COPY_TABLES
+    return any(_columns(conn, "main", table) != _columns(conn, "live", table) for table in tables)
+
+
+def sync_replica(db_path=DB_PATH, replica_path=None):
+    """Bring the replica up to date. Returns 'snapshot', 'incremental' or 'current'."""
+    replica_path = replica_path or replica_path_for(db_path)
+    with _refresh_lock:
+        if not os.path.exists(replica_path):
+            snapshot_replica(db_path, replica_path)
+            return "snapshot"
+
+        conn = sqlite3.connect(replica_path, timeout=10)
+        try:
+            conn.execute("ATTACH DATABASE ? AS live", (f"file:{os.path.abspath(db_path)}?mode=ro",))
+            rep_min, rep_max = conn.execute("SELECT MIN(id), COALESCE(MAX(id), 0) FROM main.orders").fetchone()
+            live_min, live_max = conn.execute("SELECT MIN(id), COALESCE(MAX(id), 0) FROM live.orders").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            snapshot_replica(db_path, replica_path)
+            return "snapshot"
+
+        # retention moved old orders out of the live DB: append-only no longer matches;
+        # a column added to the live DB (e.g. order_items.price, menu_items.category)
+        # needs a fresh copy too
+        if (rep_min is not None and (live_min is None or live_min > rep_min)) or _schema_changed(conn):
+            conn.close()
+            snapshot_replica(db_path, replica_path)
+            return "snapshot"
+        if live_max <= rep_max:
+            conn.close()
+            return "current"
+
+        try:
+            with conn:
+                for table, key in APPEND_TABLES:
+                    cols = ", ".join(_columns(conn, "live", table))
+                    conn.execute(f"""
+                        INSERT OR REPLACE INTO main.{table} ({cols})
+                        SELECT {cols} FROM live.{table} WHERE {key} > ?
+                    """, (rep_max,))
+                for table in COPY_TABLES:
+                    cols = ", ".join(_columns(conn, "live", table))
+                    conn.execute(f"DELETE FROM main.{table}")
+                    conn.execute(f"INSERT INTO main.{table} ({cols}) SELECT {cols} FROM live.{table}")
+        finally:
+            conn.close()
+        return "incremental"
+
+
+def stale_against_archive(conn):
+    """True if the replica (main) still holds orders that are now in the attached archive."""
+    try:
+        return conn.execute("""
+            SELECT 1 FROM archive.orders a
+            WHERE a.id >= (SELECT MIN(id) FROM main.orders)
+              AND EXISTS (SELECT 1 FROM main.orders m WHERE m.id = a.id)
+            LIMIT 1
+        """).fetchone() is not None
+    except sqlite3.OperationalError:
+        # no archive attached
+        return False
+
+
+def log_report(period, generated_on, total_orders, total_sales, total_tax):
+    """Queue a `reports` row; written by flush_reports()."""
+    with _buffer_lock:
+        _report_buffer.append((generated_on, period, total_orders, total_sales, total_tax))
+
+
+def flush_reports(db_path=DB_PATH):
+    """Write queued report rows to the live DB in one transaction."""
+    with _buffer_lock:
+        rows = _report_buffer[:]
+        del _report_buffer[:]
+    if not rows:
+        return 0
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        with conn:
+            conn.executemany("""
+                INSERT INTO reports (generated_on, period, total_orders, total_sales, total_tax)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+    except sqlite3.OperationalError:
+        # billing holds the lock: keep the rows for the next flush
+        with _buffer_lock:
+            _report_buffer[:0] = rows
+        return 0
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def refresh_in_background(db_path=DB_PATH, replica_path=None, done=None):
+    """Sync the replica and flush report logs on a worker thread."""
+    def run():
+        try:
+            mode = sync_replica(db_path, replica_path)
+        except sqlite3.Error as e:
+            print(f"[WARNING] Replica refresh failed: {e}")
+            mode = None
+        flush_reports(db_path)
+        if done:
+            done(mode)
+    threading.Thread(target=run, daemon=True).start()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh the reporting replica")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--replica", default=None, help=f"default: {REPLICA_NAME} next to --db")
+    parser.add_argument("--full", action="store_true", help="force a full snapshot")
+    args = parser.parse_args()
+
+    if args.full:
+        snapshot_replica(args.db, args.replica)
+        print("[INFO] Replica snapshot taken.")
+    else:
+        print(f"[INFO] Replica {sync_replica(args.db, args.replica)}.")
@@ -0,0 +1,269 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from archive import init_archive
+
+# =========================
+# HOT / COLD RETENTION
+# =========================
+# Orders older than N days (and already covered by a day close) are moved,
+# with their lines and payments, into restaurant_archive.db next to the main
+# DB. The hot DB keeps only recent rows and gives freed pages back with
+# incremental vacuum.
+#
+# Readers that need all history open the DB with open_history(): the archive
+# is ATTACHed as `archive` and TEMP views all_orders / all_order_items /
+# all_payments union both sides. Lookups by id or timestamp are pushed down
+# into each side's indexes by SQLite. The search (orders_fts) and bill index
+# (bill_archive) rows of moved orders move to the archive DB as well; its
+# orders_out_of_order list is checked again for each batch moved.
+
+DB_PATH = "restaurant.db"
+ARCHIVE_NAME = "restaurant_archive.db"
+
+# (table, columns) moved to the archive, parent first
+TABLES = [
+    ("orders", "id, timestamp, mode, total, discount, tax, final_total, invoice_number"),
+    ("order_items", "id, order_id, item_id, quantity, price"),
+    ("payments", "id, order_id, payment_method, amount_paid"),
+]
+
+
+def archive_path_for(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_NAME)
+
+
+def _attached(conn):
+    return {row[1] for row in conn.execute("PRAGMA database_list")}
+
+
+def attach_archive(conn, archive_path, read_only=False):
+    """ATTACH the archive DB as `archive` (creating its tables unless read-only)."""
+    if "archive" in _attached(conn):
+        return
+    if read_only:
+        conn.execute("ATTACH DATABASE ? AS archive", (f"file:{archive_path}?mode=ro",))
+        return
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS archive.orders (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT,
+            mode TEXT,
+            total REAL,
+            discount REAL,
+            tax REAL,
+            final_total REAL,
+            invoice_number TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS archive.order_items (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            item_id INTEGER,
+            quantity INTEGER,
+            price REAL
+        )
+    """)
+    ensure_line_price(conn, "archive")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS archive.payments (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            payment_method TEXT,
+            amount_paid REAL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_orders_ts_id ON orders(timestamp, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_orders_invoice ON orders(invoice_number)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_orders_final_total ON orders(final_total)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_orders_mode_ts ON orders(mode, timestamp, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_order_items_order_item ON order_items(order_id, item_id)")
+    c.execute("DROP INDEX IF EXISTS archive.idx_order_items_order")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_order_items_item ON order_items(item_id, order_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_payments_order ON payments(order_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_payments_method ON payments(payment_method, order_id)")
+
+
+def _columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def ensure_line_price(conn, schema="main"):
+    """Add order_items.price (unit price at the time of sale) to older DBs."""
+    have = _columns(conn, schema, "order_items")
+    if have and "price" not in have:
+        conn.execute(f"ALTER TABLE {schema}.order_items ADD COLUMN price REAL")
+
+
+def _select_list(conn, schema, table, cols):
+    """`cols` for one side of a view, NULL for columns an older DB lacks."""
+    have = set(_columns(conn, schema, table))
+    return ", ".join(c if c in have else f"NULL AS {c}" for c in cols.split(", "))
+
+
+def history_schemas(conn):
+    """Schemas holding orders, newest first: ['main'] or ['main', 'archive']."""
+    return ["main", "archive"] if "archive" in _attached(conn) else ["main"]
+
+
+def open_history(db_path=DB_PATH, archive_path=None, read_only=False, timeout=5):
+    """Connection that sees hot + archived orders through the all_* views."""
+    archive_path = archive_path or archive_path_for(db_path)
+    if read_only:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=timeout)
+    else:
+        conn = sqlite3.connect(db_path, timeout=timeout)
+    has_archive = os.path.exists(archive_path)
+    if has_archive:
+        attach_archive(conn, archive_path, read_only)
+    for table, cols in TABLES:
+        sql = f"SELECT {_select_list(conn, 'main', table, cols)} FROM main.{table}"
+        if has_archive:
+            sql += f" UNION ALL SELECT {_select_list(conn, 'archive', table, cols)} FROM archive.{table}"
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS all_{table} AS {sql}")
+    return conn
+
+
+def _ensure_incremental_vacuum(conn):
+    """Switch the hot DB to auto_vacuum=INCREMENTAL (needs one full VACUUM)."""
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != 2:
+        print("[INFO] Enabling incremental vacuum on the hot DB (one-time VACUUM)...")
+        conn.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM main")
+
+
+def _checkpoint(conn):
+    """Highest order id covered by a day close, or None if closes aren't used."""
+    try:
+        row = conn.execute("SELECT last_order_id FROM day_closes ORDER BY id DESC LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else 0
+
+
+def _has_table(conn, schema, name):
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _move_index_rows(conn, ids):
+    """Move orders_fts and bill_archive rows for the order ids selected by `ids` (SQL)."""
+    # imported here: search imports this module
+    from search import FTS_COLUMNS
+
+    if _has_table(conn, "main", "orders_fts"):
+        conn.execute(f"DELETE FROM archive.orders_fts WHERE rowid IN ({ids})")
+        conn.execute(f"""
+            INSERT INTO archive.orders_fts (rowid, {FTS_COLUMNS})
+            SELECT rowid, {FTS_COLUMNS} FROM main.orders_fts WHERE rowid IN ({ids})
+        """)
+        conn.execute(f"DELETE FROM main.orders_fts WHERE rowid IN ({ids})")
+    if _has_table(conn, "main", "orders_out_of_order"):
+        conn.execute(f"DELETE FROM main.orders_out_of_order WHERE order_id IN ({ids})")
+    if _has_table(conn, "main", "bill_archive"):
+        invoices = f"SELECT invoice_number FROM archive.orders WHERE id IN ({ids})"
+        conn.execute(f"""
+            INSERT OR REPLACE INTO archive.bill_archive
+            SELECT * FROM main.bill_archive WHERE invoice_number IN ({invoices})
+        """)
+        conn.execute(f"DELETE FROM main.bill_archive WHERE invoice_number IN ({invoices})")
+
+
+def _init_archive_indexes(conn):
+    """Create the archive's orders_fts / bill_archive / orders_out_of_order, adopting rows left behind by older runs."""
+    from search import init_fts, init_out_of_order
+
+    init_out_of_order(conn, "archive")
+    if _has_table(conn, "archive", "orders_fts") and _has_table(conn, "archive", "bill_archive"):
+        return
+    init_fts(conn, "archive")
+    init_archive(conn, "archive")
+    if not conn.execute("SELECT 1 FROM archive.orders LIMIT 1").fetchone():
+        return
+    print("[INFO] Moving search and bill index rows of already archived orders...")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _move_index_rows(conn, "SELECT id FROM archive.orders")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def archive_old_orders(db_path=DB_PATH, days=90, batch=1000, archive_path=None, vacuum=True, progress=None):
+    """Move orders older than `days` to the archive DB in batches. Returns the count moved."""
+    archive_path = archive_path or archive_path_for(db_path)
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    if vacuum:
+        _ensure_incremental_vacuum(conn)
+    ensure_line_price(conn)
+    attach_archive(conn, archive_path)
+    _init_archive_indexes(conn)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS move_ids (id INTEGER PRIMARY KEY)")
+
+    # never archive orders a close hasn't reported yet
+    limit_id = _checkpoint(conn)
+    # imported here: search imports this module
+    from search import mark_out_of_order
+
+    moved = 0
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            sql = "SELECT id FROM main.orders WHERE timestamp < ?"
+            params = [cutoff]
+            if limit_id is not None:
+                sql += " AND id <= ?"
+                params.append(limit_id)
+            conn.execute("DELETE FROM temp.move_ids")
+            conn.execute(f"INSERT INTO temp.move_ids {sql} ORDER BY id LIMIT ?", params + [batch])
+            count = conn.execute("SELECT COUNT(*) FROM temp.move_ids").fetchone()[0]
+            if not count:
+                conn.rollback()
+                break
+            for table, cols in TABLES:
+                key = "id" if table == "orders" else "order_id"
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO archive.{table} ({cols})
+                    SELECT {cols} FROM main.{table} WHERE {key} IN (SELECT id FROM temp.move_ids)
+                """)
+            mark_out_of_order(conn, conn.execute("SELECT MIN(id) FROM temp.move_ids").fetchone()[0], "archive")
+            _move_index_rows(conn, "SELECT id FROM temp.move_ids")
+            # children first so a crash mid-way can never orphan lines
+            for table, _ in reversed(TABLES):
+                key = "id" if table == "orders" else "order_id"
+                conn.execute(f"DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM temp.move_ids)")
+            conn.commit()
+            moved += count
+            if progress:
+                progress(moved)
+    except Exception:
+        conn.rollback()
+        raise
+
+    if vacuum and moved:
+        # the pragma frees pages one result row at a time
+        conn.execute("PRAGMA main.incremental_vacuum").fetchall()
+    conn.close()
+    return moved
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move old orders into the archive DB")
+    parser.add_argument("--days", type=int, default=90, help="keep this many days in the hot DB")
+    parser.add_argument("--batch", type=int, default=1000, help="orders per transaction")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--archive", default=None, help=f"archive DB (default: {ARCHIVE_NAME} next to --db)")
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+
+    moved = archive_old_orders(args.db, args.days, args.batch, args.archive, not args.no_vacuum,
+                               progress=lambda n: print(f"[INFO] moved {n} order(s)", flush=True))
+    print(f"✅ Archived {moved} order(s) older than {args.days} days.")
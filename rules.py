@@ -0,0 +1,418 @@
+import json
+import sqlite3
+from bisect import bisect_right
+from datetime import datetime
+
+# =========================
+# PRICING RULES (TAX SLABS / PROMOTIONS)
+# =========================
+# Rules live in the `pricing_rules` table:
+#
+#   tax       GST slab: `percent` for an item or a category (overrides the
+#             item's own tax_percent; item rules beat category rules)
+#   discount  happy hour / item promo: `percent` or `amount` (₹ per unit) off
+#             an item, a category or the whole menu; the best one per item wins
+#   combo     `amount` (₹) off every complete set of `items` ("3:1,7:2")
+#   coupon    `percent` or `amount` (₹) off the bill for `code`, once the
+#             subtotal reaches `min_subtotal`
+#
+# Any rule can be limited to `days` (Mon=0 .. Sun=6, e.g. "01234") and a
+# `start_time`-`end_time` window ("HH:MM"; may cross midnight). `days` names
+# the day a window opens on, so a Friday 22:00-02:00 rule still applies at
+# 01:00 on Saturday.
+#
+# At menu load the rules are compiled into a PriceBook. For each time slot
+# (a stretch of the week in which no rule starts or ends) it builds lookup
+# tables once: item -> (price, best unit discount, tax rate) and
+# item -> combos it takes part in. A Cart keeps each line's result and
+# running sums in paise, so changing one line only re-evaluates that line
+# and the combos containing it; the bill totals are then O(1).
+#
+# Line discounts reduce the taxable value of the line. Combo, coupon and the
+# cashier's manual discount are taken off the bill after tax, like before.
+
+DB_PATH = "restaurant.db"
+KINDS = ("tax", "discount", "combo", "coupon")
+COLUMNS = ["name", "kind", "item_id", "category", "percent", "amount", "items",
+           "code", "min_subtotal", "days", "start_time", "end_time", "active"]
+
+
+def init_rules(conn):
+    """Create the rules table if missing."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pricing_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            item_id INTEGER,
+            category TEXT,
+            percent REAL DEFAULT 0,
+            amount REAL DEFAULT 0,
+            items TEXT,
+            code TEXT,
+            min_subtotal REAL DEFAULT 0,
+            days TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            active INTEGER DEFAULT 1
+        )
+    """)
+
+
+def load_rules(conn):
+    """Active rules as a list of dicts."""
+    init_rules(conn)
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    return [dict(r) for r in cur.execute("SELECT * FROM pricing_rules WHERE active = 1 ORDER BY id")]
+
+
+def load_categories(conn):
+    """{menu item id: category}; empty if the menu has no category column."""
+    try:
+        return dict(conn.execute("SELECT id, category FROM menu_items"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def _paise(rupees):
+    return int(round(float(rupees or 0) * 100))
+
+
+def _minutes(hhmm):
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _parse_items(spec):
+    """"3:1,7:2" -> ((3, 1), (7, 2))"""
+    pairs = []
+    for part in (spec or "").split(","):
+        if part.strip():
+            item_id, _, qty = part.partition(":")
+            pairs.append((int(item_id), int(qty or 1)))
+    return tuple(pairs)
+
+
+def _active(rule, weekday, minute):
+    days = rule.get("days")
+    start, end = rule.get("start_time"), rule.get("end_time")
+    if not start or not end:
+        return not days or str(weekday) in days
+    lo, hi = _minutes(start), _minutes(end)
+    if lo <= hi:
+        on, day = lo <= minute < hi, weekday
+    elif minute >= lo:
+        on, day = True, weekday
+    else:
+        # after midnight: the window opened the day before
+        on, day = minute < hi, (weekday - 1) % 7
+    return on and (not days or str(day) in days)
+
+
+# =========================
+# COMPILED RULES
+# =========================
+class SlotTables:
+    """Lookup tables for one time slot."""
+    __slots__ = ("line", "combos_by_item", "combos", "coupons")
+
+    def __init__(self, line, combos_by_item, combos, coupons):
+        self.line = line                        # item_id -> (price, unit_off, tax_pct, rule name)
+        self.combos_by_item = combos_by_item    # item_id -> (combo index, ...)
+        self.combos = combos                    # [(name, ((item_id, need), ...), off), ...]
+        self.coupons = coupons                  # CODE -> (name, percent, off, min_subtotal)
+
+
+class PriceBook:
+    """Rules compiled against one menu; tables are built once per time slot."""
+
+    def __init__(self, menu_by_id, rules=(), categories=None):
+        self.menu_by_id = menu_by_id
+        self.categories = categories or {}
+        # missing keys (JSON / hand-written rules) read as NULL columns
+        self.rules = [dict(dict.fromkeys(COLUMNS), **r) for r in rules if r.get("kind") in KINDS]
+        # slot edges in minutes since midnight; a slot is (weekday, edge index)
+        edges = {0}
+        for r in self.rules:
+            if r.get("start_time") and r.get("end_time"):
+                edges.add(_minutes(r["start_time"]))
+                edges.add(_minutes(r["end_time"]))
+        self.edges = sorted(edges)
+        self._tables = {}
+
+    def slot(self, now=None):
+        now = now or datetime.now()
+        return now.weekday(), bisect_right(self.edges, now.hour * 60 + now.minute) - 1
+
+    def tables(self, now=None):
+        key = self.slot(now)
+        tables = self._tables.get(key)
+        if tables is None:
+            tables = self._tables[key] = self._build(*key)
+        return tables
+
+    def _build(self, weekday, edge):
+        minute = self.edges[edge]
+        active = [r for r in self.rules if _active(r, weekday, minute)]
+
+        item_tax, cat_tax, item_disc, cat_disc, all_disc = {}, {}, {}, {}, []
+        combos, coupons = [], {}
+        for r in active:
+            kind = r["kind"]
+            if kind == "tax":
+                if r.get("item_id") is not None:
+                    item_tax[r["item_id"]] = float(r["percent"] or 0)
+                elif r.get("category"):
+                    cat_tax[r["category"]] = float(r["percent"] or 0)
+            elif kind == "discount":
+                if r.get("item_id") is not None:
+                    item_disc.setdefault(r["item_id"], []).append(r)
+                elif r.get("category"):
+                    cat_disc.setdefault(r["category"], []).append(r)
+                else:
+                    all_disc.append(r)
+            elif kind == "combo":
+                need = _parse_items(r.get("items"))
+                if need:
+                    combos.append((r["name"], need, _paise(r["amount"])))
+            elif kind == "coupon" and r.get("code"):
+                coupons[r["code"].strip().upper()] = (
+                    r["name"], float(r["percent"] or 0), _paise(r["amount"]), _paise(r["min_subtotal"]))
+
+        line = {}
+        for item_id, row in self.menu_by_id.items():
+            price = _paise(row[2])
+            category = self.categories.get(item_id)
+            if item_id in item_tax:
+                tax_pct = item_tax[item_id]
+            elif category in cat_tax:
+                tax_pct = cat_tax[category]
+            else:
+                tax_pct = float(row[4] or 0)
+            best, name = 0, None
+            for r in item_disc.get(item_id, []) + cat_disc.get(category, []) + all_disc:
+                off = max(int(round(price * float(r["percent"] or 0) / 100)), _paise(r["amount"]))
+                if off > best:
+                    best, name = min(off, price), r["name"]
+            line[item_id] = (price, best, tax_pct, name)
+
+        combos_by_item = {}
+        for index, (_, need, _) in enumerate(combos):
+            for item_id, _ in need:
+                combos_by_item[item_id] = combos_by_item.get(item_id, ()) + (index,)
+        return SlotTables(line, combos_by_item, combos, coupons)
+
+    def tax_rate(self, item_id, now=None):
+        entry = self.tables(now).line.get(item_id)
+        return entry[2] if entry else 0.0
+
+
+# =========================
+# INCREMENTAL CART
+# =========================
+class Cart:
+    """Cart whose totals are kept up to date line by line (amounts in paise)."""
+
+    def __init__(self, book, now=None):
+        self.book = book
+        self.slot = book.slot(now)
+        self.tables = book.tables(now)
+        self.qty = {}
+        self.lines = {}        # item_id -> (gross, off, tax, rule name)
+        self.combo_off = {}    # combo index -> paise
+        self.gross = self.line_off = self.tax = self.combo_total = 0
+        self.coupon = None
+
+    def set_qty(self, item_id, qty):
+        """Change one line; only that line and its combos are re-evaluated."""
+        qty = max(int(qty or 0), 0)
+        if self.qty.get(item_id, 0) == qty:
+            return
+        entry = self.tables.line.get(item_id)
+        if entry is None:
+            return
+        if qty:
+            self.qty[item_id] = qty
+        else:
+            self.qty.pop(item_id, None)
+
+        old = self.lines.pop(item_id, None)
+        if old:
+            self.gross -= old[0]
+            self.line_off -= old[1]
+            self.tax -= old[2]
+        if qty:
+            price, unit_off, tax_pct, name = entry
+            gross, off = price * qty, unit_off * qty
+            tax = int(round((gross - off) * tax_pct / 100))
+            self.lines[item_id] = (gross, off, tax, name)
+            self.gross += gross
+            self.line_off += off
+            self.tax += tax
+
+        for index in self.tables.combos_by_item.get(item_id, ()):
+            _, need, off = self.tables.combos[index]
+            sets = min(self.qty.get(i, 0) // n for i, n in need)
+            self.combo_total += sets * off - self.combo_off.get(index, 0)
+            self.combo_off[index] = sets * off
+
+    def update(self, cart):
+        """Sync to [(item_id, qty), ...]; items not listed drop to zero."""
+        wanted = dict(cart)
+        for item_id in list(self.qty):
+            if item_id not in wanted:
+                self.set_qty(item_id, 0)
+        for item_id, qty in wanted.items():
+            self.set_qty(item_id, qty)
+
+    def retime(self, now=None):
+        """Switch to the rules of the current time slot (re-evaluates every line)."""
+        slot = self.book.slot(now)
+        if slot == self.slot:
+            return
+        items, coupon = list(self.qty.items()), self.coupon
+        self.__init__(self.book, now)
+        self.update(items)
+        self.coupon = coupon
+
+    def set_coupon(self, code):
+        self.coupon = (code or "").strip().upper() or None
+
+    def coupon_off(self):
+        rule = self.tables.coupons.get(self.coupon) if self.coupon else None
+        if rule is None:
+            return 0
+        _, percent, amount, min_subtotal = rule
+        base = self.gross - self.line_off - self.combo_total
+        if self.gross < min_subtotal or base <= 0:
+            return 0
+        return min(max(int(round(base * percent / 100)), amount), base)
+
+    def totals(self, manual_discount=0.0):
+        """Same shape as orders.cart_totals()."""
+        discount = (self.line_off + self.combo_total + self.coupon_off()) / 100 + manual_discount
+        subtotal = self.gross / 100
+        tax = self.tax / 100
+        return {
+            'subtotal': subtotal,
+            'discount': discount,
+            'tax': tax,
+            'final_total': subtotal - discount + tax,
+        }
+
+    def promotions(self):
+        """[(rule name, ₹ off), ...] applied to the current cart."""
+        applied = {}
+        for _, off, _, name in self.lines.values():
+            if off:
+                applied[name] = applied.get(name, 0) + off
+        for index, off in self.combo_off.items():
+            if off:
+                name = self.tables.combos[index][0]
+                applied[name] = applied.get(name, 0) + off
+        coupon = self.coupon_off()
+        if coupon:
+            applied[self.tables.coupons[self.coupon][0]] = coupon
+        return [(name, off / 100) for name, off in applied.items()]
+
+
+def load_price_book(conn, menu_by_id):
+    """Compile the stored rules for the given menu."""
+    return PriceBook(menu_by_id, load_rules(conn), load_categories(conn))
+
+
+# =========================
+# BENCHMARK
+# =========================
+def _bench(items=500, promos=60, lines=80, changes=20000):
+    import random
+    import time
+
+    rng = random.Random(7)
+    categories = [f"cat{i}" for i in range(12)]
+    menu_by_id = {i: (i, f"Item {i}", round(rng.uniform(20, 400), 2), None, rng.choice((5, 12, 18)))
+                  for i in range(1, items + 1)}
+    item_cat = {i: rng.choice(categories) for i in menu_by_id}
+    rules = [{"name": f"GST {c}", "kind": "tax", "category": c, "percent": rng.choice((5, 12, 18, 28))}
+             for c in categories]
+    for n in range(promos):
+        kind = rng.choice(("discount", "discount", "combo", "coupon"))
+        rule = {"name": f"promo{n}", "kind": kind, "percent": rng.choice((0, 10, 15)),
+                "amount": rng.choice((0, 5, 20)), "start_time": "00:00", "end_time": "23:59"}
+        if kind == "discount":
+            if rng.random() < 0.5:
+                rule["item_id"] = rng.randint(1, items)
+            else:
+                rule["category"] = rng.choice(categories)
+        elif kind == "combo":
+            rule["items"] = ",".join(f"{rng.randint(1, items)}:{rng.randint(1, 2)}" for _ in range(2))
+            rule["amount"] = 30
+        else:
+            rule["code"] = f"CODE{n}"
+        rules.append(rule)
+
+    t0 = time.perf_counter()
+    book = PriceBook(menu_by_id, rules, item_cat)
+    book.tables()
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    cart = Cart(book)
+    picked = rng.sample(sorted(menu_by_id), lines)
+    for item_id in picked:
+        cart.set_qty(item_id, rng.randint(1, 4))
+    cart.set_coupon(next((r["code"] for r in rules if r.get("code")), None))
+
+    ops = [(rng.choice(picked), rng.randint(0, 5)) for _ in range(changes)]
+    t0 = time.perf_counter()
+    for item_id, qty in ops:
+        cart.set_qty(item_id, qty)
+        cart.totals()
+    incremental_us = (time.perf_counter() - t0) / changes * 1e6
+
+    # reference: recompute the whole cart on every change
+    full = Cart(book)
+    reps = max(changes // 20, 1)
+    t0 = time.perf_counter()
+    for item_id, qty in ops[:reps]:
+        full.__init__(book)
+        full.update(cart.qty.items())
+        full.set_coupon(cart.coupon)
+        full.totals()
+    full_us = (time.perf_counter() - t0) / reps * 1e6
+    assert full.totals() == cart.totals()
+
+    print(f"{items} items, {len(rules)} rules, {lines}-line cart: compile {compile_ms:.1f} ms, "
+          f"per change {incremental_us:.1f} µs incremental vs {full_us:.1f} µs full recompute")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pricing rules: list / import / benchmark")
+    parser.add_argument("cmd", choices=["list", "import", "bench"])
+    parser.add_argument("file", nargs="?", help="JSON list of rules for import")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--lines", type=int, default=80, help="cart lines for bench")
+    parser.add_argument("--promos", type=int, default=60, help="promotions for bench")
+    args = parser.parse_args()
+
+    if args.cmd == "bench":
+        _bench(promos=args.promos, lines=args.lines)
+    else:
+        conn = sqlite3.connect(args.db)
+        init_rules(conn)
+        if args.cmd == "import":
+            with open(args.file, encoding="utf-8") as f:
+                rules = json.load(f)
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO pricing_rules ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [tuple(r.get(c, 1 if c == "active" else None) for c in COLUMNS) for r in rules])
+            print(f"[INFO] Imported {len(rules)} rule(s).")
+        for r in load_rules(conn):
+            scope = r['item_id'] or r['category'] or r['items'] or r['code'] or "all"
+            when = f"{r['days'] or ''} {r['start_time'] or ''}-{r['end_time'] or ''}".strip(" -")
+            print(f"{r['id']:>4}  {r['kind']:<9}{r['name']:<24}{scope!s:<16}"
+                  f"{r['percent'] or 0:>6.1f}%  ₹{r['amount'] or 0:>7.2f}  {when}")
+        conn.close()
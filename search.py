@@ -0,0 +1,534 @@
+import re
+
+from retention import history_schemas
+
+# =========================
+# ORDER SEARCH
+# =========================
+# orders_fts is an FTS5 index keyed by order id (rowid) holding the invoice
+# number, item names, payment method and mode of each order; free text goes
+# through it. The item filter resolves to menu item ids and goes through
+# order_items(item_id, order_id); amount, date, mode and payment use
+# ordinary B-tree indexes. Results are paged with a (timestamp, id) keyset.
+#
+# Each filter's selectivity is counted (up to WIDE_MATCH) and picks the
+# plan: fetch and sort the rows of a filter that selects few; else walk the
+# most selective text / item / payment index by descending order id (orders
+# are written in time order; the few that are not, after a clock change, are
+# listed in orders_out_of_order and merged in); else walk the date index
+# newest-first. With an attached
+# archive DB the same query runs against both sides and the two pages are
+# merged; retention moves the FTS rows of archived orders into the
+# archive's own orders_fts. `python search.py bench --db <copy>` times the
+# plans on a large DB.
+
+PAGE_SIZE = 50
+# below this many rows a filter's matches are fetched and sorted
+NARROW_RANGE = 5000
+# filters are counted up to this many rows; up to it the text matches are
+# built into a rowid set once, above it each row is probed instead
+WIDE_MATCH = 10000
+# a prefix covering at most this many indexed words is searched as those words
+PREFIX_TERMS = 16
+FTS_COLUMNS = "invoice_number, items, payment_method, mode"
+
+
+def init_search(conn):
+    """Create the secondary indexes and the FTS table if missing."""
+    c = conn.cursor()
+    c.execute("CREATE INDEX IF NOT EXISTS idx_orders_ts_id ON orders(timestamp, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_orders_invoice ON orders(invoice_number)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_orders_final_total ON orders(final_total)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_orders_mode_ts ON orders(mode, timestamp, id)")
+    # (order_id, item_id) serves every order_id lookup idx_order_items_order did
+    c.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order_item ON order_items(order_id, item_id)")
+    c.execute("DROP INDEX IF EXISTS idx_order_items_order")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_order_items_item ON order_items(item_id, order_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_payments_order ON payments(order_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_payments_method ON payments(payment_method, order_id)")
+    init_fts(conn)
+    init_out_of_order(conn)
+
+
+def init_fts(conn, schema="main"):
+    """Create the orders_fts table in `schema` if missing."""
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.orders_fts USING fts5(
+            {FTS_COLUMNS},
+            tokenize = "unicode61 tokenchars '-'"
+        )
+    """)
+
+
+def fts_for(conn, schema):
+    """The orders_fts holding `schema`'s orders.
+
+    Archives written before retention moved FTS rows have none of their own;
+    their rows are still in main.orders_fts.
+    """
+    found = conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'orders_fts'").fetchone()
+    return f"{schema}.orders_fts" if found else "main.orders_fts"
+
+
+def init_out_of_order(conn, schema="main"):
+    """Create `schema`.orders_out_of_order if missing, listing the orders already there."""
+    if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'orders_out_of_order'").fetchone():
+        return
+    conn.execute(f"CREATE TABLE {schema}.orders_out_of_order (order_id INTEGER PRIMARY KEY)")
+    mark_out_of_order(conn, schema=schema)
+    conn.commit()
+
+
+def mark_out_of_order(conn, first_id=0, schema="main"):
+    """List the orders from `first_id` on that break time order.
+
+    An order is out of order when a lower id has a later timestamp or a
+    higher id an earlier one (the clock was set back between them); both
+    orders of such a pair are listed. Call inside the transaction that wrote
+    the orders.
+    """
+    latest = ""
+    if first_id:
+        # newest timestamp below first_id; the walk stops at the first lower id
+        row = conn.execute(f"""
+            SELECT timestamp FROM {schema}.orders INDEXED BY idx_orders_ts_id
+            WHERE id < ? ORDER BY timestamp DESC, id DESC LIMIT 1
+        """, (first_id,)).fetchone()
+        latest = row[0] if row else ""
+    marked = set()
+    for order_id, ts in conn.execute(f"SELECT id, timestamp FROM {schema}.orders WHERE id >= ? ORDER BY id",
+                                     (first_id,)):
+        if (ts or "") < latest:
+            marked.add(order_id)
+        else:
+            latest = ts or ""
+    earliest = None
+    for order_id, ts in conn.execute(f"SELECT id, timestamp FROM {schema}.orders WHERE id >= ? ORDER BY id DESC",
+                                     (first_id,)):
+        if earliest is not None and (ts or "") > earliest:
+            marked.add(order_id)
+        else:
+            earliest = ts or ""
+    if first_id and earliest is not None:
+        # lower ids the new orders were written behind
+        marked.update(r[0] for r in conn.execute(
+            f"SELECT id FROM {schema}.orders INDEXED BY idx_orders_ts_id WHERE timestamp > ? AND id < ?",
+            (earliest, first_id)))
+    conn.executemany(f"INSERT OR IGNORE INTO {schema}.orders_out_of_order (order_id) VALUES (?)",
+                     ((order_id,) for order_id in marked))
+
+
+def index_order(conn, order_id):
+    """(Re)index one order. Call inside the transaction that wrote it."""
+    row = conn.execute("""
+        SELECT o.invoice_number, o.mode,
+               (SELECT group_concat(mi.name, ' | ')
+                  FROM order_items oi JOIN menu_items mi ON mi.id = oi.item_id
+                 WHERE oi.order_id = o.id),
+               (SELECT group_concat(p.payment_method, ' ')
+                  FROM payments p WHERE p.order_id = o.id)
+        FROM orders o WHERE o.id = ?
+    """, (order_id,)).fetchone()
+    if not row:
+        return
+    invoice_number, mode, items, methods = row
+    conn.execute("DELETE FROM orders_fts WHERE rowid = ?", (order_id,))
+    conn.execute(
+        "INSERT INTO orders_fts (rowid, invoice_number, items, payment_method, mode) VALUES (?, ?, ?, ?, ?)",
+        (order_id, invoice_number or "", items or "", methods or "", mode or ""))
+
+
+def sync_search_index(conn, batch=5000):
+    """Index every order above the FTS high-water mark. Returns the count."""
+    last = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM orders_fts").fetchone()[0]
+    if conn.execute("SELECT 1 FROM orders WHERE id > ? LIMIT 1", (last,)).fetchone():
+        # orders written without save_order were not checked either
+        mark_out_of_order(conn, last + 1)
+        conn.commit()
+    done = 0
+    while True:
+        last = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM orders_fts").fetchone()[0]
+        ids = [r[0] for r in conn.execute(
+            "SELECT id FROM orders WHERE id > ? ORDER BY id LIMIT ?", (last, batch))]
+        if not ids:
+            break
+        for order_id in ids:
+            index_order(conn, order_id)
+        conn.commit()
+        done += len(ids)
+    return done
+
+
+def _vocab(conn, fts):
+    """Temp fts5vocab table listing the words of `fts` (one row per word)."""
+    schema = fts.split(".")[0]
+    name = f"{schema}_fts_vocab"
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS temp.{name} USING fts5vocab({schema}, orders_fts, row)")
+    return f"temp.{name}"
+
+
+def _quote(word):
+    return '"' + word.replace('"', '""') + '"'
+
+
+def _fts_query(conn, fts, text):
+    """Turn free text into a safe FTS5 query.
+
+    A word already in the index is matched whole; anything else is taken as
+    a prefix (typeahead). A prefix covering up to PREFIX_TERMS indexed words
+    is spelled out as those words, which stream from the index like any
+    other word; a wider one (e.g. "ORD-2024") stays a prefix query, which
+    has to merge the lists of every word it covers first.
+    """
+    tokens = re.findall(r"[\w-]+", text or "")
+    if not tokens:
+        return None
+    vocab = _vocab(conn, fts)
+    terms = []
+    for t in tokens:
+        word = t.lower()
+        if conn.execute(f"SELECT 1 FROM {fts} WHERE orders_fts MATCH ? LIMIT 1", (_quote(word),)).fetchone():
+            terms.append(_quote(word))
+            continue
+        # fts5vocab counts each word's rows as it lists it, so the LIMIT
+        # also caps the cost of looking
+        words = [r[0] for r in conn.execute(
+            f"SELECT term FROM {vocab} WHERE term >= ? AND term < ? LIMIT ?",
+            (word, word + "\U0010ffff", PREFIX_TERMS + 1))]
+        if words and len(words) <= PREFIX_TERMS:
+            terms.append("(" + " OR ".join(_quote(w) for w in words) + ")")
+        else:
+            terms.append(_quote(t) + "*")
+    return " ".join(terms)
+
+
+def _words(text):
+    return [w.lower() for w in re.findall(r"[\w-]+", text or "")]
+
+
+def _item_ids(conn, item):
+    """Menu item ids whose name has every word of `item`, or None for no filter.
+
+    As in _fts_query, a word some item name has is matched whole and
+    anything else as the start of a word.
+    """
+    wanted = _words(item)
+    if not wanted:
+        return None
+    names = {item_id: _words(name) for item_id, name in conn.execute("SELECT id, name FROM main.menu_items")}
+    known = {w for words in names.values() for w in words}
+
+    def has(words, w):
+        return w in words if w in known else any(x.startswith(w) for x in words)
+
+    return [item_id for item_id, words in names.items() if all(has(words, w) for w in wanted)]
+
+
+def search_orders(conn, text=None, invoice=None, item=None, min_amount=None, max_amount=None,
+                  payment_method=None, mode=None, date_from=None, date_to=None,
+                  after=None, limit=PAGE_SIZE):
+    """Return one page of matching orders, newest first.
+
+    Rows are (id, invoice_number, timestamp, mode, final_total, payment_method).
+    Pass the (timestamp, id) of the last row as `after` to get the next page.
+    `text` searches invoice numbers, item names, payment method and mode;
+    `item` keeps orders containing a menu item whose name has those words.
+    """
+    rows = []
+    for schema in history_schemas(conn):
+        rows.extend(_search_schema(conn, schema, text, invoice, item, min_amount, max_amount,
+                                   payment_method, mode, date_from, date_to, after, limit))
+    rows.sort(key=_newest_first, reverse=True)
+    return rows[:limit]
+
+
+def _newest_first(row):
+    return row[2] or "", row[0]
+
+
+def _search_schema(conn, schema, text, invoice, item, min_amount, max_amount,
+                   payment_method, mode, date_from, date_to, after, limit):
+    fts = fts_for(conn, schema)
+    match = _fts_query(conn, fts, text)
+    item_ids = _item_ids(conn, item)
+    if item_ids == []:
+        return []
+    items_in = ", ".join("?" * len(item_ids or ()))
+
+    # per-row conditions, (sql, params)
+    where, by_amount = [], []
+    if invoice:
+        where.append(("o.invoice_number = ?", [invoice.strip()]))
+    if min_amount is not None:
+        by_amount.append(("o.final_total >= ?", [float(min_amount)]))
+    if max_amount is not None:
+        by_amount.append(("o.final_total <= ?", [float(max_amount)]))
+    where += by_amount
+    if mode:
+        where.append(("o.mode = ?", [mode]))
+    if date_from:
+        where.append(("o.timestamp >= ?", [date_from]))
+    if date_to:
+        where.append(("o.timestamp < date(?, '+1 day')", [date_to]))
+    if after:
+        where.append(("(o.timestamp, o.id) < (?, ?)", list(after)))
+    probes = {}
+    if item_ids:
+        probes["item"] = (f"EXISTS (SELECT 1 FROM {schema}.order_items oi "
+                          f"WHERE oi.order_id = o.id AND oi.item_id IN ({items_in}))", list(item_ids))
+    if payment_method:
+        probes["payment"] = (f"EXISTS (SELECT 1 FROM {schema}.payments p "
+                             f"WHERE p.order_id = o.id AND p.payment_method = ?)", [payment_method])
+
+    # how many rows each filter with an index of its own selects; a text,
+    # single item or payment filter on its own is walked (plan 2) whatever
+    # its size, and counting a wide prefix costs as much as the walk
+    amount = min_amount is not None or max_amount is not None
+    indexed = [name for name, on in (("text", match), ("item", item_ids), ("amount", amount),
+                                     ("payment", payment_method)) if on]
+    alone = (indexed in (["text"], ["payment"]) or indexed == ["item"] and len(item_ids) == 1) \
+        and not (invoice or date_from or date_to)
+
+    def size(sql, params):
+        return WIDE_MATCH if alone else _count(conn, sql, params)
+
+    sizes = {}
+    if match:
+        sizes["text"] = size(f"SELECT 1 FROM {fts} WHERE orders_fts MATCH ?", [match])
+        if not sizes["text"]:
+            return []
+        probes["text"] = _text_probe(fts, match, sizes["text"])
+    if invoice:
+        return _fetch(conn, schema, f"{schema}.orders o", [], where + list(probes.values()), limit)
+    if item_ids:
+        sizes["item"] = size(f"SELECT 1 FROM {schema}.order_items WHERE item_id IN ({items_in})", item_ids)
+    if amount:
+        lo = float(min_amount) if min_amount is not None else float("-inf")
+        hi = float(max_amount) if max_amount is not None else float("inf")
+        sizes["amount"] = size(f"SELECT 1 FROM {schema}.orders WHERE final_total BETWEEN ? AND ?", [lo, hi])
+    if payment_method:
+        sizes["payment"] = size(f"SELECT 1 FROM {schema}.payments WHERE payment_method = ?", [payment_method])
+
+    def others(name):
+        return where + [probe for key, probe in probes.items() if key != name]
+
+    # 1. one filter selects few rows: fetch just those and sort them
+    if sizes:
+        name = min(sizes, key=sizes.get)
+        if sizes[name] < NARROW_RANGE:
+            if name == "text":
+                return _fetch(conn, schema, f"{fts} f CROSS JOIN {schema}.orders o ON o.id = f.rowid", [],
+                              [("f.orders_fts MATCH ?", [match])] + others(name), limit)
+            if name == "amount":
+                # the item / payment / text probes need only the id, so they
+                # run on the index before any order row is read
+                ids, args = _select(f"{schema}.orders o INDEXED BY idx_orders_final_total",
+                                    by_amount + list(probes.values()), columns="o.id")
+                return _fetch(conn, schema, f"({ids}) d CROSS JOIN {schema}.orders o ON o.id = d.id", args,
+                              [cond for cond in where if cond not in by_amount], limit)
+            if name == "item":
+                ids = f"SELECT DISTINCT order_id FROM {schema}.order_items WHERE item_id IN ({items_in})"
+                args = list(item_ids)
+            else:
+                ids = f"SELECT DISTINCT order_id FROM {schema}.payments WHERE payment_method = ?"
+                args = [payment_method]
+            return _fetch(conn, schema, f"({ids}) d CROSS JOIN {schema}.orders o ON o.id = d.order_id", args,
+                          others(name), limit)
+
+    # 2. no date range: walk the most selective of the text match, a single
+    # item or the payment method by descending order id; orders are written
+    # in time order, so the first page by id is the newest but for the few
+    # listed in orders_out_of_order
+    streams = [name for name in ("text", "item", "payment") if name in sizes]
+    if "item" in streams and len(item_ids) > 1:
+        streams.remove("item")
+    if streams and not date_from and not date_to:
+        name = min(streams, key=sizes.get)
+        if name == "text":
+            source, key, drive = (f"{fts} f CROSS JOIN {schema}.orders o ON o.id = f.rowid", "f.rowid",
+                                  ("f.orders_fts MATCH ?", [match]))
+        elif name == "item":
+            source, key, drive = (f"{schema}.order_items d INDEXED BY idx_order_items_item "
+                                  f"CROSS JOIN {schema}.orders o ON o.id = d.order_id", "d.order_id",
+                                  ("d.item_id = ?", list(item_ids)))
+        else:
+            source, key, drive = (f"{schema}.payments d INDEXED BY idx_payments_method "
+                                  f"CROSS JOIN {schema}.orders o ON o.id = d.order_id", "d.order_id",
+                                  ("d.payment_method = ?", [payment_method]))
+        # the few orders merged in after the walk are probed one by one
+        fence_conds = others("text") + [_text_exists(fts, match)] if name == "text" else others(None)
+        return _fetch_by_id(conn, schema, source, key, [drive] + others(name), fence_conds, after, limit)
+
+    # 3. walk newest-first by date (or within the mode) and filter
+    source = f"{schema}.orders o" if mode else f"{schema}.orders o INDEXED BY idx_orders_ts_id"
+    return _fetch(conn, schema, source, [], others(None), limit)
+
+
+def _text_probe(fts, match, matched):
+    """Per-row condition for the text match when something else drives the query."""
+    # up to WIDE_MATCH rows the rowid set is built once; above it each
+    # candidate is probed instead. A prefix would be merged again for every
+    # probe, so it always goes through the rowid set.
+    if matched < WIDE_MATCH or '"*' in match:
+        return f"o.id IN (SELECT rowid FROM {fts} WHERE orders_fts MATCH ?)", [match]
+    return _text_exists(fts, match)
+
+
+def _text_exists(fts, match):
+    return f"EXISTS (SELECT 1 FROM {fts} f WHERE f.orders_fts MATCH ? AND f.rowid = o.id)", [match]
+
+
+def _count(conn, sql, params, cap=WIDE_MATCH):
+    """Number of rows `sql` returns, counting no further than `cap`."""
+    return conn.execute(f"SELECT COUNT(*) FROM ({sql} LIMIT ?)", (*params, cap)).fetchone()[0]
+
+
+def _select(source, conds, schema=None, columns="o.id, o.invoice_number, o.timestamp, o.mode, o.final_total"):
+    """SELECT of the order columns (and the payment method, given the schema)
+    from `source` under (sql, params) conditions."""
+    sql = f"SELECT {columns}"
+    if schema:
+        sql += f", (SELECT p.payment_method FROM {schema}.payments p WHERE p.order_id = o.id LIMIT 1)"
+    sql += f" FROM {source}"
+    if conds:
+        sql += " WHERE " + " AND ".join(c for c, _ in conds)
+    return sql, [a for _, args in conds for a in args]
+
+
+def _with_payment(schema, sql):
+    """Add the payment method column to the rows of `sql`."""
+    return f"""
+        SELECT r.*, (SELECT p.payment_method FROM {schema}.payments p WHERE p.order_id = r.id LIMIT 1)
+        FROM ({sql}) r
+    """
+
+
+def _fetch(conn, schema, source, source_args, conds, limit):
+    """One page from `source`, newest first."""
+    sql, args = _select(source, conds)
+    # the payment lookup runs for the page only, not for every sorted row
+    sql = _with_payment(schema, sql + " ORDER BY o.timestamp DESC, o.id DESC LIMIT ?")
+    sql += " ORDER BY r.timestamp DESC, r.id DESC"
+    return conn.execute(sql, source_args + args + [int(limit)]).fetchall()
+
+
+def _fetch_by_id(conn, schema, source, key, conds, fence_conds, after, limit):
+    """One page found by walking `source` in descending order id.
+
+    The walk starts below the id of `after`. A match it can miss is out of id
+    order: newer by timestamp than the oldest row found (or than anything,
+    if the walk ran out) while older by id than every row found, or above
+    the starting id. Those are looked up in orders_out_of_order (on a DB
+    without it, in that stretch of the date index) and merged in.
+    """
+    if after:
+        conds = conds + [(f"{key} < ?", [after[1]])]
+    sql, args = _select(source, conds, schema)
+    rows, seen = [], set()
+    cur = conn.execute(sql + f" ORDER BY {key} DESC", args)
+    for row in cur:
+        # an order can list the same item or method twice
+        if row[0] not in seen:
+            seen.add(row[0])
+            rows.append(row)
+            if len(rows) == limit:
+                break
+    cur.close()
+    stretch, ids = [], []
+    if len(rows) == limit:
+        oldest = min(rows, key=_newest_first)
+        stretch.append(("({0}timestamp, {0}id) > (?, ?)", [oldest[2], oldest[0]]))
+        ids.append(("{} < ?", [min(seen)]))
+    if after:
+        stretch.append(("({0}timestamp, {0}id) < (?, ?)", list(after)))
+        ids.append(("{} > ?", [after[1]]))
+    if ids and _lists_out_of_order(conn, schema, after):
+        # every such match is one end of a pair listed in orders_out_of_order
+        test = " OR ".join(c.format("order_id") for c, _ in ids)
+        fence = f"(SELECT order_id AS id FROM {schema}.orders_out_of_order WHERE {test}) d"
+        args = [a for _, extra in ids for a in extra]
+        fence_conds = [(c.format("o."), extra) for c, extra in stretch] + fence_conds
+    elif ids:
+        # no list (an older DB): ids are checked on the date index alone
+        where = [c.format("") for c, _ in stretch] + ["(" + " OR ".join(c.format("id") for c, _ in ids) + ")"]
+        fence = f"(SELECT id FROM {schema}.orders INDEXED BY idx_orders_ts_id WHERE {' AND '.join(where)}) d"
+        args = [a for _, extra in stretch + ids for a in extra]
+    if ids:
+        rows += _fetch(conn, schema, fence + f" CROSS JOIN {schema}.orders o ON o.id = d.id", args,
+                       fence_conds, limit)
+    return sorted(rows, key=_newest_first, reverse=True)[:limit]
+
+
+def _lists_out_of_order(conn, schema, after):
+    """Whether `schema`.orders_out_of_order covers the gaps of a walk there.
+
+    A match below `after` but above its id pairs up with the `after` order
+    itself, so that order has to be in the same DB.
+    """
+    if not conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'orders_out_of_order'").fetchone():
+        return False
+    return not after or conn.execute(f"SELECT 1 FROM {schema}.orders WHERE id = ? AND timestamp = ?",
+                                     (after[1], after[0])).fetchone() is not None
+
+
+# =========================
+# BENCHMARK
+# =========================
+BENCH_CASES = [
+    {"text": "Paneer"},
+    {"text": "Pa"},
+    {"text": "Burg"},
+    {"text": "Cash"},
+    {"text": "Cash", "min_amount": 1500},
+    {"text": "ORD-2024"},
+    {"item": "Burger"},
+    {"item": "Burger", "min_amount": 1000, "max_amount": 1010},
+    {"item": "Espresso", "mode": "Delivery"},
+    {"item": "Spring", "min_amount": 100, "max_amount": 200, "payment_method": "Card"},
+    {"item": "Spring", "payment_method": "UPI", "mode": "Takeaway"},
+    {"min_amount": 100, "max_amount": 2000},
+    {"payment_method": "Card", "min_amount": 1000, "max_amount": 1010},
+    {"mode": "Takeaway", "date_from": "2024-01-01", "date_to": "2024-01-31"},
+]
+
+
+def _bench(db_path, repeat=3):
+    """Time page 1 and page 2 of BENCH_CASES against a DB (use a large copy)."""
+    import time
+
+    from retention import open_history
+
+    conn = open_history(db_path, read_only=True)
+    for case in BENCH_CASES:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = search_orders(conn, **case)
+            best = min(best, time.perf_counter() - started)
+        page2 = float("inf") if len(rows) == PAGE_SIZE else 0.0
+        for _ in range(repeat if page2 else 0):
+            started = time.perf_counter()
+            search_orders(conn, after=(rows[-1][2], rows[-1][0]), **case)
+            page2 = min(page2, time.perf_counter() - started)
+        label = ", ".join(f"{k}={v}" for k, v in case.items())
+        print(f"{label:<70} {len(rows):>3} rows  {best * 1000:7.1f} ms  page 2 {page2 * 1000:7.1f} ms")
+    conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Order search: rebuild the index / benchmark")
+    parser.add_argument("cmd", choices=["sync", "bench"])
+    parser.add_argument("--db", default="restaurant.db")
+    args = parser.parse_args()
+
+    if args.cmd == "bench":
+        _bench(args.db)
+    else:
+        import sqlite3
+
+        conn = sqlite3.connect(args.db)
+        init_search(conn)
+        print(f"[INFO] Indexed {sync_search_index(conn)} order(s).")
+        conn.close()
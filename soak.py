@@ -0,0 +1,373 @@
+import functools
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+# =========================
+# LONG-SHIFT SOAK TEST
+# =========================
+# Drives the billing UI code (menu search keystrokes, quantity entry, live
+# totals, submit + bill preview) for thousands of simulated orders against a
+# temp copy of the DB, sampling Python heap (tracemalloc), RSS and open file
+# descriptors as it goes. Fails when heap growth per 1,000 orders is over
+# budget or descriptors keep growing, and lists the app lines that
+# allocated the retained memory.
+#
+# With a display (e.g. `xvfb-run python soak.py`) the real Tk is used;
+# without one a small in-process Tk stand-in records widgets, so leaked
+# windows and images still show up as retained Python objects.
+#
+#   python soak.py --orders 5000 --budget-kb 256
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_SOURCE = os.path.join(BASE_DIR, "kiruba - Copy.png")
+
+
+# =========================
+# TK STAND-IN (no display)
+# =========================
+def _noop(*args, **kwargs):
+    return None
+
+
+class _Widget:
+    """Any Tk widget: remembers options, text and children; everything else is a no-op."""
+
+    def __init__(self, master=None, cnf=None, **kw):
+        self.master = master
+        self._children = []
+        self._options = dict(cnf or {}, **kw)
+        self._value = ""
+        self._alive = True
+        if master is not None:
+            master._children.append(self)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _noop
+
+    def configure(self, cnf=None, **kw):
+        self._options.update(cnf or {}, **kw)
+
+    config = configure
+
+    def cget(self, key):
+        return self._options.get(key, "")
+
+    def winfo_children(self):
+        return list(self._children)
+
+    def winfo_exists(self):
+        return self._alive
+
+    def destroy(self):
+        for child in list(self._children):
+            child.destroy()
+        if self.master is not None and self in self.master._children:
+            self.master._children.remove(self)
+        self._alive = False
+
+    def get(self, *args):
+        var = self._options.get("textvariable")
+        return var.get() if var else self._value
+
+    def insert(self, index, text, *tags):
+        self._value += str(text)
+
+    def delete(self, *args):
+        self._value = ""
+
+    def after(self, ms, func=None, *args):
+        return "after#0"    # timers never fire in the soak loop
+
+
+class _Entry(_Widget):
+    pass
+
+
+class _Var:
+    default = ""
+
+    def __init__(self, master=None, value=None, name=None):
+        self._value = self.default if value is None else value
+        self._traces = []
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+        for callback in self._traces:
+            callback("", "", "write")
+
+    def trace_add(self, mode, callback):
+        self._traces.append(callback)
+        return str(len(self._traces))
+
+
+class _IntVar(_Var):
+    default = 0
+
+
+class _PhotoImage:
+    def __init__(self, *args, **kw):
+        self.args, self.kw = args, kw    # holds the decoded data like the real one
+
+    def width(self):
+        return 0
+
+    height = width
+
+
+def _stub_modules():
+    """Install stand-ins for tkinter, ttk, messagebox and PIL.ImageTk."""
+    from tkinter import constants
+
+    tk = types.ModuleType("tkinter")
+    tk.__dict__.update({k: v for k, v in vars(constants).items() if k.isupper()})
+    tk.Tk = tk.Toplevel = tk.Frame = tk.Label = tk.Button = tk.Canvas = _Widget
+    tk.Text = tk.Scrollbar = tk.Listbox = _Widget
+    tk.Entry = _Entry
+    tk.StringVar, tk.IntVar, tk.BooleanVar, tk.DoubleVar = _Var, _IntVar, _IntVar, _IntVar
+    tk.PhotoImage = _PhotoImage
+    tk.TclError = RuntimeError
+    tk.__getattr__ = lambda name: _Widget
+
+    ttk = types.ModuleType("tkinter.ttk")
+    ttk.__getattr__ = lambda name: _Widget
+    tk.ttk = ttk
+
+    messagebox = types.ModuleType("tkinter.messagebox")
+    messagebox.__getattr__ = lambda name: _noop
+    tk.messagebox = messagebox
+
+    image_tk = types.ModuleType("PIL.ImageTk")
+    image_tk.PhotoImage = lambda image=None, **kw: _PhotoImage(image, **kw)
+
+    sys.modules.update({"tkinter": tk, "tkinter.ttk": ttk, "tkinter.messagebox": messagebox,
+                        "PIL.ImageTk": image_tk})
+
+
+# =========================
+# MEASUREMENT
+# =========================
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss    # peak, not current
+
+
+def open_fds():
+    for folder in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(folder))
+        except OSError:
+            continue
+    return -1
+
+
+def sample(orders):
+    gc.collect()
+    return {"orders": orders, "heap_kb": tracemalloc.get_traced_memory()[0] // 1024,
+            "rss_kb": rss_kb(), "fds": open_fds()}
+
+
+def top_call_sites(before, after, limit=10):
+    """Retained allocations between two snapshots, grouped by the newest repo frame.
+
+    Allocations with no repo frame in their recorded traceback are listed
+    under their innermost frame, printed as Python reports it.
+    """
+    own = os.path.abspath(__file__)
+    repo = BASE_DIR + os.sep
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    after, before = after.filter_traces(ignore), before.filter_traces(ignore)
+    sites = {}
+    for stat in after.compare_to(before, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        frames = list(stat.traceback)    # oldest -> newest
+        site = next((f for f in reversed(frames)
+                     if f.filename.startswith(repo) and f.filename != own), frames[-1])
+        if site.filename == own:
+            continue    # the harness's own samples
+        key = (site.filename, site.lineno)
+        size, count, alloc = sites.get(key, (0, 0, frames[-1]))
+        sites[key] = (size + stat.size_diff, count + stat.count_diff, alloc)
+    ranked = sorted(sites.items(), key=lambda kv: kv[1][0], reverse=True)[:limit]
+    lines = []
+    for (filename, lineno), (size, count, alloc) in ranked:
+        # stdlib / frozen frames as they are, not relative to the repo
+        where = f"{os.path.relpath(filename, BASE_DIR) if filename.startswith(repo) else filename}:{lineno}"
+        inner = f"  (in {os.path.basename(alloc.filename)}:{alloc.lineno})" \
+            if (alloc.filename, alloc.lineno) != (filename, lineno) else ""
+        lines.append(f"  {size / 1024:>9.1f} KiB {count:>+8} blocks  {where}{inner}")
+    return lines
+
+
+# =========================
+# DRIVER
+# =========================
+def _find_search_var(widget, tk):
+    """The menu search box's textvariable (the only Entry bound to one)."""
+    for child in widget.winfo_children():
+        if type(child) is tk.Entry and str(child.cget("textvariable")):
+            return child.cget("textvariable")
+        found = _find_search_var(child, tk)
+        if found is not None:
+            return found
+    return None
+
+
+def prepare_workdir(source_db):
+    """Temp folder with a DB copy (and the logo) so the soak never touches real data."""
+    folder = tempfile.mkdtemp(prefix="kiruba_soak_")
+    shutil.copyfile(source_db, os.path.join(folder, "restaurant.db"))
+    if os.path.exists(LOGO_SOURCE):
+        shutil.copyfile(LOGO_SOURCE, os.path.join(folder, "kiruba.png"))
+    return folder
+
+
+def soak(orders=500, searches=4, warmup=200, every=250, seed=7, real_tk=False, frames=4, pdf_every=20):
+    """Run the loop; returns (samples, retained call-site lines)."""
+    if not real_tk:
+        _stub_modules()
+    import tkinter as tk
+    import app
+    from archive import store_bill, export_bill
+
+    workdir = os.getcwd()
+    # keep bills and exports inside the temp folder; no modal dialogs; the
+    # KOT hub runs out of process, so pushing tickets is not part of the UI's footprint
+    app.store_bill = functools.partial(store_bill, root=os.path.join(workdir, "bills"))
+    app.export_bill = functools.partial(export_bill, root=os.path.join(workdir, "bills"),
+                                        dest_dir=os.path.join(workdir, "exports"))
+    app.messagebox = types.SimpleNamespace(showinfo=_noop, showwarning=_noop, showerror=_noop,
+                                           askyesno=lambda *a, **k: True)
+    app.publish_ticket = _noop
+
+    # a PDF takes ~0.3 s (font subsetting); render every pdf_every-th one for real
+    render_pdf_bill, last_pdf = app.render_pdf_bill, [None, 0]
+
+    def sampled_pdf(*args, **kwargs):
+        last_pdf[1] += 1
+        if last_pdf[0] is None or last_pdf[1] % pdf_every == 0:
+            last_pdf[0] = render_pdf_bill(*args, **kwargs)
+        return last_pdf[0]
+
+    app.render_pdf_bill = sampled_pdf
+
+    app.init_db()
+    app.root = tk.Tk()
+    app.root.withdraw()
+    app.current_role = "admin"
+    app.main_app()
+    search_var = _find_search_var(app.root, tk)
+
+    def type_search(text):
+        if hasattr(search_var, "set"):
+            search_var.set(text)
+        else:
+            app.root.setvar(str(search_var), text)
+
+    rng = random.Random(seed)
+    names = [(row[0], row[1] or "") for row in app.menu_data]
+    samples, warm = [], None
+    tracemalloc.start(frames)
+
+    for n in range(1, orders + 1):
+        # cashier looks items up, then clears the search and fills quantities
+        for _ in range(searches):
+            name = rng.choice(names)[1].lower()
+            for i in range(1, min(len(name), 4) + 1):
+                type_search(name[:i])
+        type_search("")
+        for item_id, _ in rng.sample(names, min(len(names), rng.randint(1, 5))):
+            entry = app.item_entries.get(item_id)
+            if entry is None:
+                continue
+            entry.delete(0, tk.END)
+            entry.insert(0, str(rng.randint(1, 3)))
+            app.on_qty_change(item_id)
+        app.submit_order()
+        for entry in app.item_entries.values():
+            entry.delete(0, tk.END)
+        if real_tk:
+            app.root.update()
+
+        if n == warmup:
+            warm = tracemalloc.take_snapshot()
+            samples.append(sample(n))
+        elif (n > warmup and (n - warmup) % every == 0) or n == orders:
+            samples.append(sample(n))
+            print(f"[INFO] {n} orders: heap {samples[-1]['heap_kb']} KiB, rss {samples[-1]['rss_kb']} KiB, "
+                  f"fds {samples[-1]['fds']}", flush=True)
+
+    sites = top_call_sites(warm, tracemalloc.take_snapshot()) if warm else []
+    tracemalloc.stop()
+    return samples, sites
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Long-shift soak test: memory / handle growth per order")
+    parser.add_argument("--db", default="restaurant.db", help="source DB (copied, never modified)")
+    parser.add_argument("--orders", type=int, default=500, help="orders to replay (about 0.4 s each)")
+    parser.add_argument("--searches", type=int, default=4, help="menu lookups typed per order")
+    parser.add_argument("--warmup", type=int, default=200, help="orders before the baseline sample")
+    parser.add_argument("--every", type=int, default=250, help="sample interval (orders)")
+    parser.add_argument("--budget-kb", type=float, default=256, help="max heap growth per 1,000 orders")
+    parser.add_argument("--fd-slack", type=int, default=4, help="allowed growth in open descriptors")
+    parser.add_argument("--pdf-every", type=int, default=20, help="render every Nth bill PDF for real (1 = all)")
+    parser.add_argument("--frames", type=int, default=4, help="traceback depth recorded per allocation")
+    parser.add_argument("--real-tk", action="store_true", help="use the real Tk (needs a display / Xvfb)")
+    parser.add_argument("--keep", action="store_true", help="keep the temp folder")
+    args = parser.parse_args()
+
+    if args.orders <= args.warmup:
+        parser.error("--orders must be larger than --warmup")
+    real_tk = args.real_tk or bool(os.environ.get("DISPLAY"))
+    workdir = prepare_workdir(os.path.abspath(args.db))
+    os.chdir(workdir)
+    print(f"[INFO] Soaking in {workdir} with {'real Tk' if real_tk else 'stubbed Tk'}")
+
+    started = time.perf_counter()
+    samples, sites = soak(args.orders, args.searches, args.warmup, args.every,
+                          real_tk=real_tk, frames=args.frames, pdf_every=args.pdf_every)
+    elapsed = time.perf_counter() - started
+
+    first, last = samples[0], samples[-1]
+    per_k = 1000 / (last["orders"] - first["orders"])
+    heap = (last["heap_kb"] - first["heap_kb"]) * per_k
+    rss = (last["rss_kb"] - first["rss_kb"]) * per_k
+    fds = last["fds"] - first["fds"]
+    print(f"\n{args.orders} orders in {elapsed:.1f}s")
+    print(f"per 1,000 orders after warm-up: heap {heap:+.1f} KiB, rss {rss:+.1f} KiB; fds {fds:+d}")
+    if sites:
+        print("retained since warm-up, by call site:")
+        print("\n".join(sites))
+
+    failed = []
+    if heap > args.budget_kb:
+        failed.append(f"heap growth {heap:.1f} KiB / 1,000 orders > budget {args.budget_kb} KiB")
+    if fds > args.fd_slack:
+        failed.append(f"open descriptors grew by {fds}")
+    if not args.keep:
+        os.chdir(BASE_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+    for reason in failed:
+        print(f"❌ {reason}")
+    if not failed:
+        print("✅ Within budget.")
+    sys.exit(1 if failed else 0)
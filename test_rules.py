@@ -0,0 +1,124 @@
+from datetime import datetime
+
+from billing import render_bill_csv
+from billrec import from_bill_csv
+from rules import Cart, PriceBook
+
+# =========================
+# PRICING RULES REGRESSION TESTS
+# =========================
+# Run with `python -m pytest -q test_rules.py`.
+
+MENU = {
+    1: (1, "Burger", 120.0, None, 5.0),
+    2: (2, "Fries", 60.0, None, 5.0),
+    3: (3, "Cola", 40.0, None, 12.0),
+}
+FRIDAY = datetime(2024, 5, 3)        # weekday() == 4
+SATURDAY = datetime(2024, 5, 4)
+
+
+def _at(day, hour, minute=0):
+    return day.replace(hour=hour, minute=minute)
+
+
+def _cart(rules, cart, when=None, categories=None, coupon=None):
+    c = Cart(PriceBook(MENU, rules, categories), when or _at(FRIDAY, 12))
+    c.update(cart)
+    c.set_coupon(coupon)
+    return c
+
+
+def test_no_rules_uses_item_tax():
+    totals = _cart([], [(1, 2), (3, 1)]).totals()
+    assert totals == {'subtotal': 280.0, 'discount': 0.0, 'tax': 16.8, 'final_total': 296.8}
+
+
+def test_line_discount_reduces_taxable_value():
+    rules = [{"name": "Burger 10%", "kind": "discount", "item_id": 1, "percent": 10}]
+    c = _cart(rules, [(1, 3)])
+    # 360 gross, 36 off, 5% tax on 324
+    assert c.totals() == {'subtotal': 360.0, 'discount': 36.0, 'tax': 16.2, 'final_total': 340.2}
+    assert c.promotions() == [("Burger 10%", 36.0)]
+
+
+def test_tax_slab_rounds_per_line_in_paise():
+    rules = [{"name": "Drinks 18", "kind": "tax", "category": "drinks", "percent": 18}]
+    c = _cart(rules, [(3, 1)], categories={3: "drinks"})
+    assert c.totals()['tax'] == 7.2
+    menu = {**MENU, 3: (3, "Cola", 0.35, None, 5.0)}
+    c = Cart(PriceBook(menu, []), _at(FRIDAY, 12))
+    c.update([(3, 1)])
+    assert c.tax == 2        # 1.75 paise rounds to 2, not 0
+
+
+def test_best_discount_wins_and_manual_discount_is_added():
+    rules = [
+        {"name": "All 5%", "kind": "discount", "percent": 5},
+        {"name": "Fries ₹10", "kind": "discount", "item_id": 2, "amount": 10},
+    ]
+    c = _cart(rules, [(1, 1), (2, 1)])
+    assert sorted(c.promotions()) == [("All 5%", 6.0), ("Fries ₹10", 10.0)]
+    totals = c.totals(manual_discount=4.0)
+    assert totals['discount'] == 20.0
+    assert totals['final_total'] == round(180.0 - 20.0 + totals['tax'], 2)
+
+
+def test_combo_counts_complete_sets_only():
+    rules = [{"name": "Meal", "kind": "combo", "items": "1:1,2:1", "amount": 30}]
+    c = _cart(rules, [(1, 2), (2, 1)])
+    assert c.totals()['discount'] == 30.0
+    c.set_qty(2, 2)
+    assert c.totals()['discount'] == 60.0
+    assert c.promotions() == [("Meal", 60.0)]
+    c.set_qty(1, 0)
+    assert c.totals()['discount'] == 0.0
+    assert c.promotions() == []
+
+
+def test_coupon_needs_minimum_subtotal():
+    rules = [{"name": "SAVE10", "kind": "coupon", "code": "save10", "percent": 10, "min_subtotal": 200}]
+    assert _cart(rules, [(1, 1)], coupon="SAVE10").totals()['discount'] == 0.0
+    c = _cart(rules, [(1, 2)], coupon=" save10 ")
+    assert c.totals()['discount'] == 24.0
+    assert c.promotions() == [("SAVE10", 24.0)]
+
+
+def test_overnight_window_belongs_to_the_day_it_opens():
+    rules = [{"name": "Late night", "kind": "discount", "percent": 50,
+              "days": "4", "start_time": "22:00", "end_time": "02:00"}]
+    book = PriceBook(MENU, rules)
+
+    def off(when):
+        c = Cart(book, when)
+        c.update([(2, 1)])
+        return c.totals()['discount']
+
+    assert off(_at(FRIDAY, 23)) == 30.0
+    assert off(_at(SATURDAY, 1)) == 30.0       # Friday's window, after midnight
+    assert off(_at(FRIDAY, 1)) == 0.0          # Thursday night: not in days
+    assert off(_at(SATURDAY, 2)) == 0.0
+    assert off(_at(SATURDAY, 23)) == 0.0
+
+
+def test_retime_switches_rules_and_keeps_the_cart():
+    rules = [{"name": "Happy hour", "kind": "discount", "percent": 20,
+              "start_time": "17:00", "end_time": "19:00"}]
+    c = _cart(rules, [(1, 1)], when=_at(FRIDAY, 16, 59))
+    assert c.totals()['discount'] == 0.0
+    c.retime(_at(FRIDAY, 17))
+    assert c.totals()['discount'] == 24.0
+    assert c.qty == {1: 1}
+
+
+def test_promotions_on_csv_bill_do_not_change_reconciliation():
+    c = _cart([{"name": "Burger 10%", "kind": "discount", "item_id": 1, "percent": 10}], [(1, 1)])
+    totals = c.totals()
+    totals['promotions'] = c.promotions()
+    items = [{'name': "Burger", 'price': 120.0, 'quantity': 1}]
+    text = render_bill_csv(items, totals)
+    assert "Promotion,Burger 10%,-12.00" in text
+    record = from_bill_csv(text, {"Burger": 1}, "ORD-0001")
+    assert record.discount == 1200
+    assert record.final_total == 11340
+    assert len(record.lines) == 1